@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+EFAST2 Crawl Journal
+
+Runs multi-filing EFAST2 crawls against a durable SQLite job journal. Every
+ACK_ID's state (pending, in_progress, done, failed, dead), attempt count, error
+class and timing is recorded as it changes, so a crawl interrupted by a crash,
+a Chrome hang or a portal outage resumes exactly where it stopped. Failed
+filings are retried with a backoff policy chosen by their error class.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import argparse
+
+import pandas as pd
+from selenium.common.exceptions import WebDriverException
+
+from efast2_cache import add_cache_arguments, cache_from_args, format_stats
+from efast2_scraper import (
+    EFAST2_SEARCH_URL, setup_browser, search_and_download_filing, wait_for_download, download_from_cache,
+)
+from instrumentation import metrics, add_metrics_arguments
+
+PENDING = "pending"
+IN_PROGRESS = "in_progress"
+DONE = "done"
+FAILED = "failed"
+DEAD = "dead"
+
+# Retry policy per error class: (base delay in seconds, maximum attempts).
+# Attempts are counted per class: a filing dies once one class uses up its
+# budget, and the delay doubles with every failure of that class.
+BACKOFF_POLICIES = {
+    "page_timeout": (30, 6),           # portal slow or down
+    "element_missing": (120, 4),       # page layout changed or partially rendered
+    "no_results": (3600, 3),           # filing may not be searchable yet
+    "no_result_rows": (3600, 3),
+    "download_click_failed": (300, 4),
+    "download_missing": (120, 4),      # click succeeded but no file landed
+    "browser_error": (60, 5),          # Chrome crashed or hung; driver is restarted
+    "unexpected": (300, 3),            # any other exception raised while crawling
+}
+DEFAULT_POLICY = (120, 3)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS filings (
+    ack_id TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error_class TEXT,
+    last_error TEXT,
+    queued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    duration REAL,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    class_attempts TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS filings_state ON filings (state, next_attempt_at);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ack_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    error_class TEXT,
+    at REAL NOT NULL,
+    duration REAL
+);
+"""
+
+
+class CrawlJournal:
+    """SQLite-backed record of every filing's crawl state"""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        # Journals created before per-class attempt counts were tracked
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(filings)")}
+        if "class_attempts" not in columns:
+            self.conn.execute("ALTER TABLE filings ADD COLUMN class_attempts TEXT NOT NULL DEFAULT '{}'")
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def _transition(self, ack_id, state, duration=None, **fields):
+        """Update a filing's columns and append the change to the event log"""
+        assignments = ", ".join(f"{name} = ?" for name in ["state", *fields])
+        now = time.time()
+        with self.conn:
+            self.conn.execute(f"UPDATE filings SET {assignments} WHERE ack_id = ?",
+                              [state, *fields.values(), ack_id])
+            self.conn.execute("INSERT INTO events (ack_id, state, error_class, at, duration) VALUES (?, ?, ?, ?, ?)",
+                              (ack_id, state, fields.get("error_class"), now, duration))
+
+    def add(self, ack_ids):
+        """
+        Queue filings; ACK_IDs already in the journal keep their current state
+
+        Returns:
+            int: Number of newly queued filings
+        """
+        now = time.time()
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO filings (ack_id, state, queued_at) VALUES (?, ?, ?)",
+                ((ack_id, PENDING, now) for ack_id in ack_ids),
+            )
+            return self.conn.total_changes - before
+
+    def recover(self):
+        """
+        Return filings left in_progress by an interrupted crawl to pending
+
+        Returns:
+            int: Number of recovered filings
+        """
+        with self.conn:
+            return self.conn.execute("UPDATE filings SET state = ? WHERE state = ?",
+                                     (PENDING, IN_PROGRESS)).rowcount
+
+    def requeue_failed(self):
+        """
+        Make failed and dead filings due immediately and give them a fresh retry budget
+
+        The per-class counts that decide when a filing dies are reset; the running
+        attempt total is kept as part of the filing's history.
+
+        Returns:
+            int: Number of requeued filings
+        """
+        with self.conn:
+            return self.conn.execute(
+                "UPDATE filings SET state = ?, class_attempts = '{}', next_attempt_at = 0 "
+                "WHERE state IN (?, ?)",
+                (FAILED, FAILED, DEAD),
+            ).rowcount
+
+    def claim_next(self, states=(PENDING, FAILED)):
+        """
+        Mark the next due filing in_progress and return its ACK_ID
+
+        Args:
+            states (tuple): States eligible to be claimed
+
+        Returns:
+            str: ACK_ID, or None if nothing is due
+        """
+        placeholders = ", ".join("?" for _ in states)
+        row = self.conn.execute(
+            f"SELECT ack_id FROM filings WHERE state IN ({placeholders}) AND next_attempt_at <= ? "
+            "ORDER BY state = 'failed', next_attempt_at, queued_at LIMIT 1",
+            (*states, time.time()),
+        ).fetchone()
+        if row is None:
+            return None
+        self._transition(row[0], IN_PROGRESS, started_at=time.time())
+        return row[0]
+
+    def next_due_at(self, states=(PENDING, FAILED)):
+        """Return the earliest next_attempt_at among waiting filings, or None"""
+        placeholders = ", ".join("?" for _ in states)
+        row = self.conn.execute(
+            f"SELECT MIN(next_attempt_at) FROM filings WHERE state IN ({placeholders})", states
+        ).fetchone()
+        return row[0]
+
+    def mark_done(self, ack_id, duration):
+        self._transition(ack_id, DONE, duration=duration, attempts=self._attempts(ack_id) + 1,
+                         error_class=None, last_error=None, finished_at=time.time())
+
+    def mark_failed(self, ack_id, error_class, error, duration):
+        """
+        Record a failed attempt and schedule the retry according to the error class
+
+        Returns:
+            str: New state (failed, or dead once the error class's attempt budget is used up)
+        """
+        base_delay, max_attempts = BACKOFF_POLICIES.get(error_class, DEFAULT_POLICY)
+        class_attempts = json.loads(self.conn.execute(
+            "SELECT class_attempts FROM filings WHERE ack_id = ?", (ack_id,)).fetchone()[0])
+        class_attempts[error_class] = class_attempts.get(error_class, 0) + 1
+        failures = class_attempts[error_class]
+        state = DEAD if failures >= max_attempts else FAILED
+        next_attempt_at = time.time() + base_delay * 2 ** (failures - 1)
+        self._transition(ack_id, state, error_class=error_class, duration=duration,
+                         attempts=self._attempts(ack_id) + 1, class_attempts=json.dumps(class_attempts),
+                         last_error=(error or "")[:500], finished_at=time.time(),
+                         next_attempt_at=next_attempt_at)
+        return state
+
+    def release(self, ack_id):
+        """Return an in_progress filing to pending without counting an attempt"""
+        self._transition(ack_id, PENDING)
+
+    def _attempts(self, ack_id):
+        return self.conn.execute("SELECT attempts FROM filings WHERE ack_id = ?", (ack_id,)).fetchone()[0]
+
+    def summary(self):
+        """Return the number of filings in each state"""
+        rows = self.conn.execute("SELECT state, COUNT(*) FROM filings GROUP BY state").fetchall()
+        return dict(rows)
+
+    def failures(self):
+        """Return failed and dead filings with their last error"""
+        return pd.read_sql_query(
+            "SELECT ack_id, state, attempts, error_class, last_error, next_attempt_at FROM filings "
+            "WHERE state IN (?, ?) ORDER BY error_class, ack_id",
+            self.conn, params=(FAILED, DEAD),
+        )
+
+
+def read_ack_ids(path):
+    """
+    Read ACK_IDs from a text file (one per line) or from the ACK_ID column of a CSV
+
+    Returns:
+        list: ACK_IDs in file order, without blanks or duplicates
+    """
+    if path.lower().endswith(".csv"):
+        ack_ids = pd.read_csv(path, usecols=["ACK_ID"], dtype=str)["ACK_ID"].dropna().tolist()
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            ack_ids = [line.strip() for line in f]
+    return list(dict.fromkeys(ack_id for ack_id in ack_ids if ack_id))
+
+
+def crawl(journal, download_dir="./downloads", efast2_url=EFAST2_SEARCH_URL, headless=True,
+          download_timeout=60, only_failed=False, wait_for_retries=True, max_retries=1, cache=None):
+    """
+    Work through the journal until no filing is pending or due for retry
+
+    Args:
+        journal (CrawlJournal): Journal to claim filings from
+        download_dir (str): Directory the browser downloads into
+        efast2_url (str): URL of the 5500 Search page
+        headless (bool): Run Chrome headless
+        download_timeout (float): Seconds to wait for a clicked download to land
+        only_failed (bool): Only retry failed filings, leaving pending ones alone
+        wait_for_retries (bool): Sleep until failed filings become due instead of exiting
+        max_retries (int): In-call retries passed to search_and_download_filing;
+                           the journal's backoff policies handle the rest
+        cache (FilingCache, optional): Search cache consulted before the browser is used
+    """
+    states = (FAILED,) if only_failed else (PENDING, FAILED)
+    download_path = os.path.abspath(download_dir)
+    driver = None
+
+    try:
+        while True:
+            ack_id = journal.claim_next(states)
+            if ack_id is None:
+                due_at = journal.next_due_at(states)
+                if due_at is None or not wait_for_retries:
+                    break
+                wait = max(0, due_at - time.time())
+                print(f"Nothing due; next retry in {wait:.0f} seconds...")
+                time.sleep(min(wait, 60))
+                continue
+
+            print(f"\nCrawling filing {ack_id}...")
+            started = time.time()
+            status = {}
+            try:
+                if cache is not None and download_from_cache(cache, ack_id, download_path):
+                    journal.mark_done(ack_id, time.time() - started)
+                    metrics.inc("crawl_filings_total", state=DONE)
+                    print(f"✅ {ack_id} served from the search cache")
+                    continue
+
+                if driver is None:
+                    driver = setup_browser(download_path, headless, capture_downloads=cache is not None)
+
+                success = search_and_download_filing(driver, ack_id, max_retries=max_retries,
+                                                     efast2_url=efast2_url, status=status, cache=cache)
+                if success and not wait_for_download(download_path, ack_id, download_timeout):
+                    success = False
+                    status.update(error_class="download_missing",
+                                  error=f"No file for {ack_id} within {download_timeout}s")
+            except KeyboardInterrupt:
+                journal.release(ack_id)
+                raise
+            except WebDriverException as e:
+                success = False
+                status.update(error_class="browser_error", error=str(e).strip())
+                print(f"Browser error, restarting Chrome: {e}")
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+                driver = None
+            except Exception as e:
+                # Never leave the filing in_progress, or it would be claimed first on every resume
+                success = False
+                status.update(error_class="unexpected", error=f"{type(e).__name__}: {e}")
+                print(f"Unexpected error crawling {ack_id}: {e}")
+
+            duration = time.time() - started
+            if success:
+                journal.mark_done(ack_id, duration)
+                metrics.inc("crawl_filings_total", state=DONE)
+                print(f"✅ {ack_id} done in {duration:.1f}s")
+            else:
+                state = journal.mark_failed(ack_id, status.get("error_class"), status.get("error"), duration)
+                metrics.inc("crawl_filings_total", state=state)
+                print(f"❌ {ack_id} {state} ({status.get('error_class')})")
+    finally:
+        if driver is not None:
+            driver.quit()
+
+
+def main(journal_path="crawl_journal.db", ack_file=None, ack_ids=None, download_dir="./downloads",
+         efast2_url=EFAST2_SEARCH_URL, headless=True, retry_failed=False, no_wait=False,
+         download_timeout=60, show_status=False, cache=None):
+    """
+    Queue filings and run (or resume) a crawl
+
+    Args:
+        journal_path (str): SQLite journal file
+        ack_file (str, optional): Text file of ACK_IDs or CSV with an ACK_ID column to queue
+        ack_ids (list, optional): ACK_IDs to queue
+        download_dir (str): Directory the browser downloads into
+        efast2_url (str): URL of the 5500 Search page
+        headless (bool): Run Chrome headless
+        retry_failed (bool): Only retry failed/dead filings, with a fresh retry budget
+        no_wait (bool): Exit instead of sleeping until failed filings are due again
+        download_timeout (float): Seconds to wait for a clicked download to land
+        show_status (bool): Print the journal summary and failures without crawling
+        cache (FilingCache, optional): Search cache; cached filings skip the portal
+    """
+    journal = CrawlJournal(journal_path)
+    try:
+        queued = journal.add((read_ack_ids(ack_file) if ack_file else []) + list(ack_ids or []))
+        if queued:
+            print(f"Queued {queued} new filings")
+
+        recovered = journal.recover()
+        if recovered:
+            print(f"Resuming {recovered} filings left in progress by an interrupted crawl")
+
+        print(f"Journal {journal_path}: {journal.summary()}")
+        if show_status:
+            failures = journal.failures()
+            if len(failures) > 0:
+                print(failures.to_string(index=False))
+            return
+
+        if retry_failed:
+            print(f"Requeued {journal.requeue_failed()} failed filings for retry")
+
+        try:
+            crawl(journal, download_dir, efast2_url, headless, download_timeout,
+                  only_failed=retry_failed, wait_for_retries=not no_wait, cache=cache)
+        except KeyboardInterrupt:
+            print("\nInterrupted; the journal records where to resume.")
+
+        print(f"\nJournal {journal_path}: {journal.summary()}")
+        if cache is not None:
+            print(f"Search cache: {format_stats(cache.stats())}")
+    finally:
+        journal.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resumable EFAST2 filing crawl backed by a job journal")
+    parser.add_argument("--journal", type=str, default="crawl_journal.db", help="SQLite journal file")
+    parser.add_argument("--ack-file", type=str, help="Text file of ACK_IDs or CSV with an ACK_ID column to queue")
+    parser.add_argument("--ack-id", type=str, nargs="+", help="ACK_IDs to queue")
+    parser.add_argument("--download-dir", type=str, default="./downloads", help="Download directory")
+    parser.add_argument("--url", type=str, default=EFAST2_SEARCH_URL,
+                        help="URL of the 5500 Search page (default: live DOL portal)")
+    parser.add_argument("--show-browser", action="store_true", help="Run Chrome with a visible window")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="Only retry failed filings, giving them a fresh retry budget")
+    parser.add_argument("--no-wait", action="store_true",
+                        help="Exit instead of waiting for failed filings to become due again")
+    parser.add_argument("--download-timeout", type=float, default=60,
+                        help="Seconds to wait for each download to land (default: 60)")
+    parser.add_argument("--status", action="store_true", help="Show journal state and failures, then exit")
+    add_cache_arguments(parser)
+    add_metrics_arguments(parser)
+
+    args = parser.parse_args()
+
+    metrics.configure(jsonl_path=args.metrics_jsonl, port=args.metrics_port)
+    cache = cache_from_args(args)
+    try:
+        main(journal_path=args.journal, ack_file=args.ack_file, ack_ids=args.ack_id,
+             download_dir=args.download_dir, efast2_url=args.url, headless=not args.show_browser,
+             retry_failed=args.retry_failed, no_wait=args.no_wait,
+             download_timeout=args.download_timeout, show_status=args.status, cache=cache)
+    finally:
+        if cache is not None:
+            cache.close()
+        metrics.close()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+EFAST2 Scraper Benchmark
+
+Runs search_and_download_filing against the local mock portal at several
+concurrency levels and reports filings/minute, per-step latency and retry rates.
+Each worker thread drives its own Chrome instance with its own download directory.
+"""
+
+import os
+import json
+import time
+import queue
+import shutil
+import argparse
+import tempfile
+import threading
+import statistics
+from collections import defaultdict
+
+import efast2_scraper
+from efast2_scraper import setup_browser, search_and_download_filing, wait_for_download
+from efast2_mock_server import start_mock_server, add_config_arguments, config_from_args
+
+STEPS = ["navigate", "fill_form", "results", "click_download", "download"]
+
+
+def generate_filing_ids(count):
+    """Generate synthetic ACK_IDs in the same shape as real ones"""
+    return [f"20240924{index:06d}NAL{index:010d}001" for index in range(count)]
+
+
+def run_worker(worker_id, work, results, server_url, download_root, headless, max_retries, download_timeout):
+    """Drive one browser through filings from the shared queue until it is empty"""
+    download_dir = os.path.join(download_root, f"worker_{worker_id}")
+    driver = setup_browser(download_dir, headless)
+    try:
+        while True:
+            try:
+                filing_id = work.get_nowait()
+            except queue.Empty:
+                return
+
+            started = time.time()
+            success = search_and_download_filing(
+                driver, filing_id, max_retries=max_retries,
+                efast2_url=f"{server_url}?ref={filing_id}",
+            )
+            returned = time.time()
+            landed = success and wait_for_download(download_dir, filing_id, download_timeout)
+
+            results.append({
+                "filing_id": filing_id,
+                "worker": worker_id,
+                "success": bool(success),
+                "downloaded": bool(landed),
+                "call_seconds": returned - started,
+                "total_seconds": time.time() - started,
+            })
+    finally:
+        driver.quit()
+
+
+def step_latencies(events):
+    """
+    Derive per-step latencies for one filing from the mock server request log
+
+    Steps are measured for the last attempt: the final page load, the search that
+    followed it and the download request.
+
+    Returns:
+        dict: Step name to seconds (steps that did not happen are omitted)
+    """
+    pages = [e for e in events if e["kind"] == "page" and e["status"] == 200]
+    searches = [e for e in events if e["kind"] == "search" and e["status"] == 200]
+    downloads = [e for e in events if e["kind"] == "download"]
+
+    steps = {}
+    if not pages:
+        return steps
+    page = pages[-1]
+    steps["navigate"] = page["finished"] - page["started"]
+
+    search = next((e for e in searches if e["started"] >= page["finished"]), None)
+    if search is None:
+        return steps
+    steps["fill_form"] = search["started"] - page["finished"]
+    steps["results"] = search["finished"] - search["started"]
+
+    download = next((e for e in downloads if e["started"] >= search["finished"]), None)
+    if download is None:
+        return steps
+    steps["click_download"] = download["started"] - search["finished"]
+    steps["download"] = download["finished"] - download["started"]
+    return steps
+
+
+def summarize(seconds):
+    """Return mean/p50/p95/max for a list of durations"""
+    if not seconds:
+        return None
+    ordered = sorted(seconds)
+    p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+    return {
+        "mean": statistics.fmean(ordered),
+        "p50": statistics.median(ordered),
+        "p95": ordered[p95_index],
+        "max": ordered[-1],
+    }
+
+
+def run_level(server, concurrency, filing_ids, headless, max_retries, download_timeout):
+    """
+    Benchmark one concurrency level
+
+    Returns:
+        dict: Throughput, success, retry and per-step latency summary
+    """
+    server.stats.reset()
+    work = queue.Queue()
+    for filing_id in filing_ids:
+        work.put(filing_id)
+
+    results = []
+    download_root = tempfile.mkdtemp(prefix=f"efast2_bench_c{concurrency}_")
+    threads = [
+        threading.Thread(
+            target=run_worker,
+            args=(worker_id, work, results, server.search_url, download_root,
+                  headless, max_retries, download_timeout),
+        )
+        for worker_id in range(concurrency)
+    ]
+
+    started = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - started
+    shutil.rmtree(download_root, ignore_errors=True)
+
+    events_by_filing = defaultdict(list)
+    for event in server.stats.snapshot():
+        if event["filing_id"]:
+            events_by_filing[event["filing_id"]].append(event)
+
+    attempts = []
+    steps = defaultdict(list)
+    for filing_id in filing_ids:
+        events = sorted(events_by_filing.get(filing_id, []), key=lambda e: e["started"])
+        attempts.append(sum(1 for e in events if e["kind"] == "page"))
+        for step, seconds in step_latencies(events).items():
+            steps[step].append(seconds)
+
+    downloaded = sum(1 for r in results if r["downloaded"])
+    retried = sum(1 for a in attempts if a > 1)
+    return {
+        "concurrency": concurrency,
+        "filings": len(filing_ids),
+        "elapsed_seconds": elapsed,
+        "filings_per_minute": downloaded / elapsed * 60 if elapsed > 0 else 0.0,
+        "success_rate": sum(1 for r in results if r["success"]) / len(filing_ids),
+        "download_rate": downloaded / len(filing_ids),
+        "retry_rate": retried / len(filing_ids),
+        "mean_attempts": statistics.fmean(attempts) if attempts else 0.0,
+        "call_seconds": summarize([r["call_seconds"] for r in results]),
+        "steps": {step: summarize(steps[step]) for step in STEPS if steps[step]},
+    }
+
+
+def print_report(report):
+    """Print a human-readable summary of one concurrency level"""
+    print("\n" + "=" * 50)
+    print(f"Concurrency: {report['concurrency']}  Filings: {report['filings']}")
+    print(f"Elapsed: {report['elapsed_seconds']:.1f}s  Throughput: {report['filings_per_minute']:.2f} filings/min")
+    print(f"Success rate: {report['success_rate']:.1%}  Downloads landed: {report['download_rate']:.1%}")
+    print(f"Retry rate: {report['retry_rate']:.1%}  Mean attempts: {report['mean_attempts']:.2f}")
+    if report["call_seconds"]:
+        call = report["call_seconds"]
+        print(f"search_and_download_filing: mean {call['mean']:.2f}s  p50 {call['p50']:.2f}s  "
+              f"p95 {call['p95']:.2f}s  max {call['max']:.2f}s")
+    for step, summary in report["steps"].items():
+        print(f"  {step:<15} mean {summary['mean']:.3f}s  p50 {summary['p50']:.3f}s  "
+              f"p95 {summary['p95']:.3f}s  max {summary['max']:.3f}s")
+
+
+def main(concurrency_levels=(1, 2, 4), filings=10, headless=True, max_retries=3,
+         download_timeout=30, config=None, output_path=None):
+    """
+    Run the benchmark across concurrency levels against a fresh mock portal
+
+    Args:
+        concurrency_levels (iterable): Number of parallel browsers to test
+        filings (int): Number of filings to fetch per level
+        headless (bool): Run Chrome headless
+        max_retries (int): Retries passed to search_and_download_filing
+        download_timeout (float): Seconds to wait for each download to land
+        config (MockPortalConfig, optional): Mock portal latency/failure settings
+        output_path (str, optional): Write the reports as JSON to this path
+    """
+    # Debug screenshots would add to the measured step latencies and litter the working directory
+    efast2_scraper.SCREENSHOT_DIR = None
+    server = start_mock_server(config)
+    reports = []
+    try:
+        for concurrency in concurrency_levels:
+            print(f"\nBenchmarking {filings} filings at concurrency {concurrency}...")
+            report = run_level(server, concurrency, generate_filing_ids(filings),
+                               headless, max_retries, download_timeout)
+            print_report(report)
+            reports.append(report)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+        print(f"\nBenchmark results saved to {output_path}")
+
+    return reports
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the EFAST2 scraper against the local mock portal")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4],
+                        help="Concurrency levels to test (default: 1 2 4)")
+    parser.add_argument("--filings", type=int, default=10, help="Filings per concurrency level (default: 10)")
+    parser.add_argument("--max-retries", type=int, default=3, help="Retries per filing (default: 3)")
+    parser.add_argument("--download-timeout", type=float, default=30,
+                        help="Seconds to wait for each download to land (default: 30)")
+    parser.add_argument("--show-browser", action="store_true", help="Run Chrome with a visible window")
+    parser.add_argument("--output", type=str, help="Write results as JSON to this path")
+    add_config_arguments(parser)
+
+    args = parser.parse_args()
+
+    main(
+        concurrency_levels=args.concurrency,
+        filings=args.filings,
+        headless=not args.show_browser,
+        max_retries=args.max_retries,
+        download_timeout=args.download_timeout,
+        config=config_from_args(args),
+        output_path=args.output,
+    )
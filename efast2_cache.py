@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+EFAST2 Search Cache
+
+Persistent TTL cache of EFAST2 5500 Search results. Maps ACK_IDs to the
+results-table metadata and resolved download target of a filing, and
+sponsor/EIN search queries to their result rows, so repeated lookups skip the
+portal round trip. Entries expire after a per-kind TTL, the cache is bounded by
+evicting the least recently used entries, and hit/miss statistics are kept.
+
+A filing lookup only counts as a hit once the caller has actually avoided the
+portal with it; an entry that could not be used is counted as a fallback.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import argparse
+
+from instrumentation import metrics
+
+FILING = "filing"
+SEARCH = "search"
+
+# Filing metadata never changes once published; search results grow as filings arrive
+DEFAULT_TTLS = {
+    FILING: 30 * 24 * 3600,
+    SEARCH: 24 * 3600,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+COUNTERS = ["hits", "misses", "fallbacks", "expired", "evictions"]
+
+
+class FilingCache:
+    """SQLite-backed TTL cache with least-recently-used eviction"""
+
+    def __init__(self, path="efast2_cache.db", ttls=None, max_entries=100000):
+        """
+        Args:
+            path (str): SQLite cache file
+            ttls (dict, optional): Seconds to live per kind ('filing', 'search')
+            max_entries (int): Entries kept before the least recently used are evicted
+        """
+        self.path = path
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.executemany("INSERT OR IGNORE INTO counters (name, value) VALUES (?, 0)",
+                              ((name,) for name in COUNTERS))
+        self.conn.commit()
+        self.entry_count = self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+    def _count(self, name, kind):
+        self.conn.execute("UPDATE counters SET value = value + 1 WHERE name = ?", (name,))
+        metrics.inc(f"efast2_cache_{name}_total", kind=kind)
+
+    def record(self, name, kind):
+        """Count the outcome ('hits' or 'fallbacks') of an entry returned with count_hit=False"""
+        with self.conn:
+            self._count(name, kind)
+
+    def get(self, kind, key, count_hit=True):
+        """
+        Look up an entry
+
+        Args:
+            kind (str): 'filing' or 'search'
+            key (str): Entry key within the kind
+            count_hit (bool): Count a found entry as a hit; pass False when the caller
+                              decides whether the entry was usable and calls record()
+
+        Returns:
+            The cached value, or None on a miss or expired entry
+        """
+        now = time.time()
+        with self.conn:
+            row = self.conn.execute("SELECT value, expires_at FROM entries WHERE key = ?",
+                                    (f"{kind}:{key}",)).fetchone()
+            if row is None:
+                self._count("misses", kind)
+                return None
+            value, expires_at = row
+            if expires_at <= now:
+                self.conn.execute("DELETE FROM entries WHERE key = ?", (f"{kind}:{key}",))
+                self.entry_count -= 1
+                self._count("expired", kind)
+                self._count("misses", kind)
+                return None
+            self.conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, f"{kind}:{key}"))
+            if count_hit:
+                self._count("hits", kind)
+        return json.loads(value)
+
+    def put(self, kind, key, value, ttl=None):
+        """
+        Store an entry, evicting the least recently used entries if the cache is full
+
+        Args:
+            kind (str): 'filing' or 'search'
+            key (str): Entry key within the kind
+            value: JSON-serializable value
+            ttl (float, optional): Seconds to live (defaults to the kind's TTL)
+        """
+        now = time.time()
+        expires_at = now + (ttl if ttl is not None else self.ttls[kind])
+        with self.conn:
+            exists = self.conn.execute("SELECT 1 FROM entries WHERE key = ?", (f"{kind}:{key}",)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries (key, kind, value, created_at, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (f"{kind}:{key}", kind, json.dumps(value), now, expires_at, now),
+            )
+            if not exists:
+                self.entry_count += 1
+            if self.entry_count > self.max_entries:
+                self._evict(self.entry_count - self.max_entries)
+
+    def _evict(self, count):
+        evicted = self.conn.execute(
+            "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY last_access LIMIT ?)",
+            (count,),
+        ).rowcount
+        self.entry_count -= evicted
+        self.conn.execute("UPDATE counters SET value = value + ? WHERE name = 'evictions'", (evicted,))
+        metrics.inc("efast2_cache_evictions_total", evicted)
+
+    def get_filing(self, ack_id):
+        """
+        Return cached metadata and download target for an ACK_ID, or None
+
+        The caller records whether the entry was used with record('hits' or 'fallbacks', 'filing').
+        """
+        return self.get(FILING, ack_id.strip(), count_hit=False)
+
+    def put_filing(self, ack_id, metadata):
+        self.put(FILING, ack_id.strip(), metadata)
+
+    def get_search(self, category, query):
+        """Return cached result rows for a search query, or None"""
+        return self.get(SEARCH, f"{category}:{query.strip().upper()}")
+
+    def put_search(self, category, query, rows):
+        self.put(SEARCH, f"{category}:{query.strip().upper()}", rows)
+
+    def purge_expired(self):
+        """
+        Delete every expired entry
+
+        Returns:
+            int: Number of deleted entries
+        """
+        with self.conn:
+            purged = self.conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),)).rowcount
+        self.entry_count -= purged
+        return purged
+
+    def stats(self):
+        """Return entry counts per kind and the persisted hit/miss counters"""
+        counters = dict(self.conn.execute("SELECT name, value FROM counters").fetchall())
+        lookups = counters["hits"] + counters["misses"] + counters["fallbacks"]
+        kinds = dict(self.conn.execute("SELECT kind, COUNT(*) FROM entries GROUP BY kind").fetchall())
+        return {
+            "entries": self.entry_count,
+            "max_entries": self.max_entries,
+            "by_kind": kinds,
+            **counters,
+            "hit_rate": counters["hits"] / lookups if lookups else 0.0,
+        }
+
+
+def format_stats(stats):
+    """Summarize FilingCache.stats() on one line"""
+    return (f"{stats['hits']} hits, {stats['misses']} misses, {stats['fallbacks']} fallbacks "
+            f"({stats['hit_rate']:.0%} hit rate), {stats['entries']} entries")
+
+
+def add_cache_arguments(parser, default=None):
+    """Add the search cache options to an argparse parser"""
+    parser.add_argument("--cache", type=str, default=default,
+                        help="SQLite search cache file" + (f" (default: {default})" if default else ""))
+    parser.add_argument("--cache-filing-ttl", type=float, default=DEFAULT_TTLS[FILING] / 3600,
+                        help="Hours a cached filing stays valid (default: %(default)g)")
+    parser.add_argument("--cache-search-ttl", type=float, default=DEFAULT_TTLS[SEARCH] / 3600,
+                        help="Hours cached search results stay valid (default: %(default)g)")
+    parser.add_argument("--cache-max-entries", type=int, default=100000,
+                        help="Entries kept before the least recently used are evicted (default: %(default)d)")
+
+
+def cache_from_args(args):
+    """Open the FilingCache described by parsed add_cache_arguments options, or None if --cache is unset"""
+    if not args.cache:
+        return None
+    ttls = {FILING: args.cache_filing_ttl * 3600, SEARCH: args.cache_search_ttl * 3600}
+    return FilingCache(args.cache, ttls=ttls, max_entries=args.cache_max_entries)
+
+
+def main(cache, purge=False, clear=False):
+    """
+    Show cache statistics, optionally purging expired entries or clearing the cache
+
+    Args:
+        cache (FilingCache): Cache to inspect
+        purge (bool): Delete expired entries
+        clear (bool): Delete every entry
+    """
+    try:
+        if clear:
+            with cache.conn:
+                cache.conn.execute("DELETE FROM entries")
+            cache.entry_count = 0
+            print("Cache cleared")
+        elif purge:
+            print(f"Purged {cache.purge_expired()} expired entries")
+
+        for name, value in cache.stats().items():
+            print(f"{name}: {value}")
+    finally:
+        cache.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or maintain the EFAST2 search cache")
+    add_cache_arguments(parser, default="efast2_cache.db")
+    parser.add_argument("--purge", action="store_true", help="Delete expired entries")
+    parser.add_argument("--clear", action="store_true", help="Delete every entry")
+
+    args = parser.parse_args()
+
+    main(cache_from_args(args), purge=args.purge, clear=args.clear)
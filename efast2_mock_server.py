@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+EFAST2 Mock Server
+
+Serves a local stand-in for the DOL EFAST2 5500Search page so the scraper can be
+exercised without touching the live portal. The page exposes the same element IDs
+and classes that efast2_scraper.py relies on (categoryType, search-field,
+button.closeXBtn, usa-table and the file_download SVG), and downloads return
+real PDF or ZIP payloads. Latency and failures can be injected per request type.
+"""
+
+import io
+import html
+import json
+import zlib
+import time
+import random
+import zipfile
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, quote, unquote
+
+SEARCH_PATH = "/5500Search/"
+DOWNLOAD_PATH = "/5500Search/download/"
+STATS_PATH = "/__stats"
+
+SEARCH_PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>EFAST2 5500 Search (mock)</title>
+</head>
+<body>
+    <div id="popup" class="usa-modal">
+        <p>This site is a local stand-in for the EFAST2 5500 Search portal.</p>
+        <button id="button.closeXBtn" type="button"
+                onclick="document.getElementById('popup').style.display='none'">X</button>
+    </div>
+    <form method="get" action="{search_path}">
+        <select id="categoryType" name="categoryType">
+            {category_options}
+        </select>
+        <input id="search-field" name="q" type="text" placeholder="Search" value="{query}">
+        <button class="usa-button" type="submit">Search</button>
+    </form>
+    {results}
+</body>
+</html>
+"""
+
+RESULTS_TABLE_TEMPLATE = """<table class="usa-table">
+        <thead>
+            <tr><th>Plan Name</th><th>Sponsor Name</th><th>EIN</th><th>Plan Year</th><th>ACK ID</th><th></th></tr>
+        </thead>
+        <tbody>
+            {rows}
+        </tbody>
+    </table>"""
+
+RESULT_ROW_TEMPLATE = """<tr>
+                <td>{plan_name}</td><td>{sponsor_name}</td><td>{ein}</td><td>{plan_year}</td><td>{ack_id}</td>
+                <td class="table-padding-spec" onclick="window.location.href='{download_url}'">
+                    <svg class="afs-cursor-pointer" width="24" height="24" aria-hidden="true">
+                        <use xlink:href="/assets/img/sprite.svg#file_download"></use>
+                    </svg>
+                </td>
+            </tr>"""
+
+NO_RESULTS_HTML = '<div class="usa-alert usa-alert--error">No results found.</div>'
+
+CATEGORIES = ["Plan Name", "Sponsor Name", "EIN", "ACK ID"]
+
+
+def build_pdf(filing_id):
+    """
+    Build a small, valid single-page PDF identifying the filing
+
+    Args:
+        filing_id (str): Filing ID (ACK_ID) to print on the page
+
+    Returns:
+        bytes: PDF file contents
+    """
+    text = f"Form 5500 mock filing {filing_id}".replace("(", "").replace(")", "")
+    stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode("latin-1")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        b"/Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+
+    xref_offset = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n".encode()
+    pdf += b"0000000000 65535 f \n"
+    for offset in offsets:
+        pdf += f"{offset:010d} 00000 n \n".encode()
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n".encode()
+    pdf += f"startxref\n{xref_offset}\n%%EOF\n".encode()
+    return bytes(pdf)
+
+
+def build_zip(filing_id):
+    """
+    Build a ZIP archive containing the filing PDF
+
+    Args:
+        filing_id (str): Filing ID (ACK_ID) used for the archive member name
+
+    Returns:
+        bytes: ZIP file contents
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zip_ref:
+        zip_ref.writestr(f"{filing_id}.pdf", build_pdf(filing_id))
+    return buffer.getvalue()
+
+
+class MockPortalConfig:
+    """
+    Latency and failure-injection settings for the mock portal
+
+    Latencies are (min, max) ranges in seconds; each request sleeps for a uniform
+    random duration within the range. Failure rates are probabilities in [0, 1].
+    """
+
+    def __init__(self, page_latency=(0.0, 0.0), search_latency=(0.0, 0.0),
+                 download_latency=(0.0, 0.0), page_error_rate=0.0,
+                 empty_result_rate=0.0, download_error_rate=0.0,
+                 payload="pdf", show_popup=True, seed=None):
+        self.page_latency = page_latency
+        self.search_latency = search_latency
+        self.download_latency = download_latency
+        self.page_error_rate = page_error_rate
+        self.empty_result_rate = empty_result_rate
+        self.download_error_rate = download_error_rate
+        self.payload = payload
+        self.show_popup = show_popup
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def roll(self, rate):
+        """Return True with the given probability"""
+        with self.lock:
+            return self.random.random() < rate
+
+    def delay(self, latency):
+        """Sleep for a random duration within the latency range"""
+        low, high = latency
+        with self.lock:
+            seconds = self.random.uniform(low, high)
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class MockPortalStats:
+    """Thread-safe request log used by the benchmark to derive per-step timings"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.events = []
+
+    def record(self, kind, filing_id, status, started, finished):
+        with self.lock:
+            self.events.append({
+                "kind": kind,
+                "filing_id": filing_id,
+                "status": status,
+                "started": started,
+                "finished": finished,
+            })
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.events)
+
+    def reset(self):
+        with self.lock:
+            self.events.clear()
+
+
+class MockPortalHandler(BaseHTTPRequestHandler):
+    """Request handler for the mock 5500Search pages and downloads"""
+
+    server_version = "EFAST2Mock/1.0"
+
+    def log_message(self, format, *args):
+        # Keep the console quiet; the stats endpoint carries the request log
+        pass
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path.rstrip("/") == SEARCH_PATH.rstrip("/"):
+            self.handle_search(parse_qs(parsed.query))
+        elif parsed.path.startswith(DOWNLOAD_PATH):
+            self.handle_download(unquote(parsed.path[len(DOWNLOAD_PATH):]))
+        elif parsed.path == STATS_PATH:
+            self.send_json(self.server.stats.snapshot())
+        else:
+            self.send_error(404)
+
+    def handle_search(self, params):
+        config = self.server.config
+        query = params.get("q", [""])[0].strip()
+        category = params.get("categoryType", [CATEGORIES[0]])[0]
+        kind = "search" if query else "page"
+        # Callers may tag the initial page load with ?ref=<filing_id> so the
+        # benchmark can attribute page loads (and therefore retries) to a filing
+        filing_id = query or params.get("ref", [None])[0]
+        started = time.time()
+
+        config.delay(config.search_latency if query else config.page_latency)
+
+        if config.roll(config.page_error_rate):
+            self.send_error(503, "Service Unavailable")
+            self.server.stats.record(kind, filing_id, 503, started, time.time())
+            return
+
+        results = ""
+        if query:
+            if config.roll(config.empty_result_rate):
+                results = NO_RESULTS_HTML
+            else:
+                results = self.render_results(query, category)
+
+        options = "\n            ".join(
+            f"<option{' selected' if name == category else ''}>{html.escape(name)}</option>"
+            for name in CATEGORIES
+        )
+        page = SEARCH_PAGE_TEMPLATE.format(
+            search_path=SEARCH_PATH,
+            category_options=options,
+            query=html.escape(query),
+            results=results,
+        )
+        if not config.show_popup:
+            page = page.replace('<div id="popup" class="usa-modal">', '<div id="popup" style="display:none">')
+
+        self.send_body(200, page.encode("utf-8"), "text/html; charset=utf-8")
+        self.server.stats.record(kind, filing_id, 200, started, time.time())
+
+    def render_results(self, query, category):
+        filing_id = query if category == "ACK ID" else f"MOCK{zlib.crc32(query.encode()):012d}"
+        row = RESULT_ROW_TEMPLATE.format(
+            plan_name=html.escape(f"{query} HEALTH AND WELFARE PLAN" if category != "ACK ID" else "MOCK PLAN"),
+            sponsor_name="MOCK SPONSOR INC",
+            ein="000000000",
+            plan_year="2023",
+            ack_id=html.escape(filing_id),
+            download_url=DOWNLOAD_PATH + quote(filing_id),
+        )
+        return RESULTS_TABLE_TEMPLATE.format(rows=row)
+
+    def handle_download(self, filing_id):
+        config = self.server.config
+        started = time.time()
+
+        config.delay(config.download_latency)
+
+        if not filing_id or config.roll(config.download_error_rate):
+            self.send_error(500, "Download failed")
+            self.server.stats.record("download", filing_id or None, 500, started, time.time())
+            return
+
+        if config.payload == "zip":
+            body, content_type, filename = build_zip(filing_id), "application/zip", f"{filing_id}.zip"
+        else:
+            body, content_type, filename = build_pdf(filing_id), "application/pdf", f"{filing_id}.pdf"
+
+        self.send_body(200, body, content_type,
+                       {"Content-Disposition": f'attachment; filename="{filename}"'})
+        self.server.stats.record("download", filing_id, 200, started, time.time())
+
+    def send_json(self, payload):
+        self.send_body(200, json.dumps(payload).encode("utf-8"), "application/json")
+
+    def send_body(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MockPortalServer(ThreadingHTTPServer):
+    """Threaded HTTP server carrying the portal config and request stats"""
+
+    daemon_threads = True
+
+    def __init__(self, address, config=None):
+        super().__init__(address, MockPortalHandler)
+        self.config = config or MockPortalConfig()
+        self.stats = MockPortalStats()
+
+    @property
+    def search_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{SEARCH_PATH}"
+
+
+def start_mock_server(config=None, host="127.0.0.1", port=0):
+    """
+    Start the mock portal in a background thread
+
+    Args:
+        config (MockPortalConfig, optional): Latency and failure settings
+        host (str): Interface to bind to
+        port (int): Port to bind to (0 picks a free port)
+
+    Returns:
+        MockPortalServer: Running server; call shutdown() to stop it
+    """
+    server = MockPortalServer((host, port), config)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    print(f"Mock EFAST2 portal running at {server.search_url}")
+    return server
+
+
+def parse_latency(value):
+    """Parse a latency argument of the form 'SECONDS' or 'MIN-MAX'"""
+    if "-" in value:
+        low, high = value.split("-", 1)
+        return float(low), float(high)
+    return float(value), float(value)
+
+
+def add_config_arguments(parser):
+    """Register the mock portal settings on an argument parser"""
+    parser.add_argument("--page-latency", type=parse_latency, default=(0.0, 0.0),
+                        help="Latency for the search page, seconds or MIN-MAX (default: 0)")
+    parser.add_argument("--search-latency", type=parse_latency, default=(0.0, 0.0),
+                        help="Latency for search results, seconds or MIN-MAX (default: 0)")
+    parser.add_argument("--download-latency", type=parse_latency, default=(0.0, 0.0),
+                        help="Latency for downloads, seconds or MIN-MAX (default: 0)")
+    parser.add_argument("--page-error-rate", type=float, default=0.0,
+                        help="Probability of a 503 response for page and search requests")
+    parser.add_argument("--empty-result-rate", type=float, default=0.0,
+                        help="Probability that a search returns no results table")
+    parser.add_argument("--download-error-rate", type=float, default=0.0,
+                        help="Probability of a 500 response for downloads")
+    parser.add_argument("--payload", choices=["pdf", "zip"], default="pdf",
+                        help="Download payload type (default: pdf)")
+    parser.add_argument("--no-popup", action="store_true", help="Do not render the popup dialog")
+    parser.add_argument("--seed", type=int, help="Random seed for latency and failure injection")
+
+
+def config_from_args(args):
+    """Build a MockPortalConfig from parsed command line arguments"""
+    return MockPortalConfig(
+        page_latency=args.page_latency,
+        search_latency=args.search_latency,
+        download_latency=args.download_latency,
+        page_error_rate=args.page_error_rate,
+        empty_result_rate=args.empty_result_rate,
+        download_error_rate=args.download_error_rate,
+        payload=args.payload,
+        show_popup=not args.no_popup,
+        seed=args.seed,
+    )
+
+
+def main(host="127.0.0.1", port=8055, config=None):
+    """
+    Run the mock portal in the foreground until interrupted
+
+    Args:
+        host (str): Interface to bind to
+        port (int): Port to bind to
+        config (MockPortalConfig, optional): Latency and failure settings
+    """
+    server = MockPortalServer((host, port), config)
+    print(f"Mock EFAST2 portal running at {server.search_url}")
+    print("Press Ctrl+C to stop")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down mock portal...")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the EFAST2 5500 Search portal")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Interface to bind to")
+    parser.add_argument("--port", type=int, default=8055, help="Port to listen on (default: 8055)")
+    add_config_arguments(parser)
+
+    args = parser.parse_args()
+
+    main(host=args.host, port=args.port, config=config_from_args(args))
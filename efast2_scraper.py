@@ -7,17 +7,21 @@ using Selenium WebDriver.
 """
 
 import os
+import re
+import json
 import time
 import zipfile
 import argparse
+import requests
 from pathlib import Path
+from urllib.parse import urljoin
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
 from selenium.webdriver.common.action_chains import ActionChains
 
 from selenium.webdriver.common.action_chains import ActionChains
@@ -26,10 +30,20 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 
+from efast2_cache import add_cache_arguments, cache_from_args, format_stats
+from instrumentation import metrics, add_metrics_arguments
+
+# Directory debug screenshots are written to; None disables them
+SCREENSHOT_DIR = "."
+
 def take_debug_screenshot(driver, name="debug"):
-    """Take a screenshot for debugging purposes"""
-    timestamp = time.strftime("%Y%m%d-%H%M%S")
-    filename = f"{name}_{timestamp}.png"
+    """Take a screenshot for debugging purposes (skipped if SCREENSHOT_DIR is None)"""
+    if SCREENSHOT_DIR is None:
+        return None
+    os.makedirs(SCREENSHOT_DIR, exist_ok=True)
+    now = time.time()
+    timestamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"-{int(now * 1000) % 1000:03d}"
+    filename = os.path.join(SCREENSHOT_DIR, f"{name}_{timestamp}.png")
     driver.save_screenshot(filename)
     print(f"Screenshot saved: {filename}")
     return filename
@@ -152,23 +166,7 @@ def click_download_icon(driver):
                     print(f"Found clickable parent: {clickable_parent.tag_name}")
                     driver.execute_script("arguments[0].click();", clickable_parent)
                     print("✅ JavaScript click on SVG parent succeeded")
-                    
-                    # Wait for download to start
-                    time.sleep(5)
-                    
-                    # Check for any files in the download directory (including PDFs)
-                    download_dir = os.path.abspath("./downloads")
-                    for attempt in range(30):  # Check for 30 seconds
-                        files = os.listdir(download_dir)
-                        download_files = [f for f in files if f.endswith(('.zip', '.pdf')) and not f.endswith('.download')]
-                        if download_files:
-                            print(f"Download detected: {download_files}")
-                            return True
-                        print(f"Waiting for download to appear... {attempt+1}/30")
-                        time.sleep(1)
-                    
-                    # If we get here, the click succeeded but no download appeared
-                    print("Download may be in progress, return True to continue...")
+                    # Callers confirm the download in their own directory with wait_for_download
                     return True
                     
                 else:
@@ -181,23 +179,6 @@ def click_download_icon(driver):
                 actions = ActionChains(driver)
                 actions.move_to_element(svg).pause(0.5).click().perform()
                 print("✅ ActionChains click on SVG succeeded")
-                
-                # Wait for download to start
-                time.sleep(5)
-                
-                # Check for any files in the download directory (including PDFs)
-                download_dir = os.path.abspath("./downloads")
-                for attempt in range(30):  # Check for 30 seconds
-                    files = os.listdir(download_dir)
-                    download_files = [f for f in files if f.endswith(('.zip', '.pdf')) and not f.endswith('.download')]
-                    if download_files:
-                        print(f"Download detected: {download_files}")
-                        return True
-                    print(f"Waiting for download to appear... {attempt+1}/30")
-                    time.sleep(1)
-                
-                # If we get here, the click succeeded but no download appeared
-                print("Download may be in progress, return True to continue...")
                 return True
             except Exception as e2:
                     print(f"ActionChains click failed: {e2}")
@@ -282,7 +263,19 @@ def click_download_icon(driver):
     print("❌ All approaches to find and click download icon failed")
     return False
 
-def setup_browser(download_dir, headless=True):
+def setup_browser(download_dir, headless=True, capture_downloads=False):
+    """
+    Start Chrome configured to download into a directory
+    
+    Args:
+        download_dir (str): Directory downloads are saved to
+        headless (bool): Run Chrome headless
+        capture_downloads (bool): Record network events so captured_download_url can
+                                  find the URL of script-started downloads (for the search cache)
+    
+    Returns:
+        webdriver.Chrome: Configured WebDriver instance
+    """
     # Get absolute path to download directory
     download_path = os.path.abspath(download_dir)
     os.makedirs(download_path, exist_ok=True)
@@ -309,6 +302,10 @@ def setup_browser(download_dir, headless=True):
         "plugins.always_open_pdf_externally": True
     }
     chrome_options.add_experimental_option("prefs", chrome_prefs)
+    
+    # Record network events so the URL of a script-started download can be captured
+    if capture_downloads:
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
 
     driver = webdriver.Chrome(options=chrome_options)
     
@@ -343,7 +340,238 @@ def setup_browser(download_dir, headless=True):
     return driver
 
 
-def search_and_download_filing(driver, filing_id, max_retries=3):
+EFAST2_SEARCH_URL = "https://www.efast.dol.gov/5500Search/"
+
+def read_results_table(table):
+    """
+    Read a search results table
+    
+    Args:
+        table (WebElement): The usa-table results element
+    
+    Returns:
+        list: One dict per result row, keyed by column header
+    """
+    headers = [th.text.strip() for th in table.find_elements(By.TAG_NAME, "th")]
+    rows = []
+    for row in table.find_elements(By.TAG_NAME, "tr"):
+        cells = [td.text.strip() for td in row.find_elements(By.TAG_NAME, "td")]
+        if cells:
+            rows.append(row_to_dict(headers, cells))
+    return rows
+
+def row_to_dict(headers, cells):
+    """Key result cell texts by column header (column_<n> for unnamed columns)"""
+    return {(headers[i] if i < len(headers) and headers[i] else f"column_{i}"): text
+            for i, text in enumerate(cells)}
+
+def download_elements(driver, row):
+    """
+    Return the elements of a result row that start its download
+    
+    These are the same targets click_download_icon clicks: the download cell,
+    links labelled Download and the element wrapping the file_download icon.
+    """
+    elements = []
+    for selector in ["td.table-padding-spec", "a[download]", "a[aria-label*='ownload']", "a[title*='ownload']"]:
+        elements.extend(row.find_elements(By.CSS_SELECTOR, selector))
+    elements.extend(row.find_elements(By.XPATH, ".//a[contains(text(), 'Download')]"))
+    for icon in row.find_elements(By.XPATH, ".//*[local-name()='use' and contains(@*[local-name()='href'], 'file_download')]"):
+        wrapper = driver.execute_script(
+            "var svg = arguments[0].closest('svg');"
+            "return svg && (svg.closest('a') || svg.closest('button') || svg.parentElement);",
+            icon,
+        )
+        if wrapper is not None:
+            elements.append(wrapper)
+    return elements
+
+def resolve_download_href(driver, row):
+    """
+    Find a direct URL for a result row's download, if the page exposes one
+    
+    Only the row's download elements are considered, so links to plan or filing
+    detail pages are never mistaken for the download.
+    
+    Args:
+        driver (webdriver.Chrome): WebDriver instance (used to resolve relative URLs)
+        row (WebElement): Result table row
+    
+    Returns:
+        str: Absolute download URL, or None if the download is only reachable by script
+    """
+    for element in download_elements(driver, row):
+        links = [element] if element.tag_name == "a" else []
+        links.extend(element.find_elements(By.CSS_SELECTOR, "a[href]"))
+        for link in links:
+            href = link.get_attribute("href")
+            if href and not href.startswith(("javascript:", "#")):
+                return href
+        scripted = [element] if element.get_attribute("onclick") else []
+        scripted.extend(element.find_elements(By.CSS_SELECTOR, "[onclick]"))
+        for item in scripted:
+            match = re.search(r"""location(?:\.href)?\s*=\s*['"]([^'"]+)['"]""", item.get_attribute("onclick") or "")
+            if match:
+                return urljoin(driver.current_url, match.group(1))
+    return None
+
+def drain_network_log(driver):
+    """Discard the network events buffered since the last call (see setup_browser's capture_downloads)"""
+    try:
+        driver.get_log("performance")
+    except WebDriverException:
+        pass
+
+def captured_download_url(driver, timeout=5):
+    """
+    Return the URL of the download the last click started, from Chrome's performance log
+    
+    The portal starts downloads from script, so the URL is only known once the
+    browser requests it. Call drain_network_log before the click so that older
+    requests are not picked up.
+    
+    Args:
+        driver (webdriver.Chrome): WebDriver created by setup_browser with capture_downloads
+        timeout (float): Seconds to wait for the download request to appear
+    
+    Returns:
+        str: Download URL, or None if no download request was seen
+    """
+    deadline = time.time() + timeout
+    while True:
+        try:
+            entries = driver.get_log("performance")
+        except WebDriverException:
+            return None
+        for entry in entries:
+            message = json.loads(entry["message"]).get("message", {})
+            method, params = message.get("method"), message.get("params", {})
+            if method in ("Page.downloadWillBegin", "Browser.downloadWillBegin") and params.get("url"):
+                return params["url"]
+            if method == "Network.responseReceived":
+                response = params.get("response", {})
+                headers = {name.lower(): value for name, value in response.get("headers", {}).items()}
+                if "attachment" in headers.get("content-disposition", "").lower():
+                    return response.get("url")
+        if time.time() >= deadline:
+            return None
+        time.sleep(0.25)
+
+def fetch_download(url, filing_id, download_dir):
+    """
+    Download a filing directly from its resolved download URL
+    
+    Args:
+        url (str): Download URL captured from an earlier portal download
+        filing_id (str): Filing ID, used to name the file if the server does not
+        download_dir (str): Directory the file is saved to
+    
+    Returns:
+        str: Saved file name, or None if the URL no longer serves the filing
+    """
+    try:
+        with requests.get(url, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            content_type = response.headers.get('Content-Type', '')
+            if 'html' in content_type:
+                # A page instead of a file: the link needs a portal session or has expired
+                print(f"Cached download link returned {content_type} instead of a filing")
+                return None
+            disposition = re.search(r'filename="?([^";]+)"?', response.headers.get('Content-Disposition', ''))
+            if disposition:
+                filename = os.path.basename(disposition.group(1))
+            else:
+                extension = '.zip' if 'zip' in content_type else '.pdf'
+                filename = f"{filing_id}{extension}"
+            os.makedirs(download_dir, exist_ok=True)
+            partial_path = os.path.join(download_dir, filename + ".download")
+            with open(partial_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=1024 * 1024):
+                    f.write(chunk)
+            os.replace(partial_path, os.path.join(download_dir, filename))
+    except (requests.exceptions.RequestException, OSError) as e:
+        print(f"Cached download link failed: {e}")
+        return None
+    return filename
+
+def download_from_cache(cache, filing_id, download_dir):
+    """
+    Satisfy a filing download from the search cache without opening the portal
+    
+    A cached filing is served if it is already in the download directory, or by
+    fetching the download URL captured when it was last downloaded. Otherwise the
+    lookup is recorded as a fallback and the caller searches the portal.
+    
+    Args:
+        cache (FilingCache): Search cache
+        filing_id (str): Filing ID (ACK_ID)
+        download_dir (str): Directory downloads are saved to
+    
+    Returns:
+        bool: True if the filing is available locally, False on a miss or fallback
+    """
+    cached = cache.get_filing(filing_id)
+    if cached is None:
+        return False
+    
+    download_path = os.path.abspath(download_dir)
+    if os.path.isdir(download_path):
+        for name in os.listdir(download_path):
+            if name.startswith(filing_id) and name.endswith(('.pdf', '.zip')):
+                cache.record("hits", "filing")
+                print(f"Cache hit: {name} is already downloaded")
+                return True
+    
+    url = cached.get("href")
+    filename = fetch_download(url, filing_id, download_path) if url else None
+    if filename is None:
+        cache.record("fallbacks", "filing")
+        print(f"Cached entry for {filing_id} has no usable download link, falling back to the portal")
+        return False
+    
+    cache.record("hits", "filing")
+    print(f"Cache hit: downloaded {filename} directly from {url}")
+    return True
+
+def search_filings(driver, query, category="Plan Name", efast2_url=EFAST2_SEARCH_URL):
+    """
+    Run a 5500 Search query (e.g. by plan or sponsor name, or EIN) and read the results
+    
+    Args:
+        driver (webdriver.Chrome): Configured Chrome WebDriver instance
+        query (str): Text to search for
+        category (str): Visible text of the search category dropdown option
+        efast2_url (str): URL of the 5500 Search page
+    
+    Returns:
+        list: One dict per result row, keyed by column header
+    """
+    driver.get(efast2_url)
+    WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "categoryType")))
+    try:
+        WebDriverWait(driver, 2).until(EC.element_to_be_clickable((By.ID, "button.closeXBtn"))).click()
+        time.sleep(1)
+    except TimeoutException:
+        pass
+    
+    Select(driver.find_element(By.ID, "categoryType")).select_by_visible_text(category)
+    search_input = driver.find_element(By.ID, "search-field")
+    search_input.clear()
+    search_input.send_keys(query)
+    driver.find_element(By.XPATH, "//button[@class='usa-button' and @type='submit']").click()
+    
+    try:
+        table = WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.CLASS_NAME, "usa-table")))
+    except TimeoutException:
+        print(f"No results for {category} '{query}'")
+        return []
+    
+    rows = read_results_table(table)
+    print(f"Found {len(rows)} results for {category} '{query}'")
+    return rows
+
+def search_and_download_filing(driver, filing_id, max_retries=3, efast2_url=EFAST2_SEARCH_URL, status=None,
+                               cache=None):
     """
     Navigate to EFAST2 search portal, search for filing ID, and download ZIP
     
@@ -351,6 +579,15 @@ def search_and_download_filing(driver, filing_id, max_retries=3):
         driver (webdriver.Chrome): Configured Chrome WebDriver instance
         filing_id (str): Filing ID (ACK_ID) to search for
         max_retries (int): Maximum number of retry attempts
+        efast2_url (str): URL of the 5500 Search page (defaults to the live DOL portal)
+        status (dict, optional): Filled with 'attempts', and on failure 'error_class'
+                                 (page_timeout, element_missing, no_results,
+                                 no_result_rows, download_click_failed) and 'error'
+        cache (FilingCache, optional): On success, the result row and the download URL
+                                       (from the row, or captured from the browser's
+                                       network log after the click) are stored here.
+                                       Callers check it with download_from_cache
+                                       before starting a browser.
     
     Returns:
         bool: True if download appears successful, False otherwise
@@ -358,18 +595,30 @@ def search_and_download_filing(driver, filing_id, max_retries=3):
     Note: This function MUST exit immediately after a successful download click
     to prevent any further page interactions that might interrupt the download.
     """
-    # URL for DOL EFAST2 5500 Search portal
-    efast2_url = "https://www.efast.dol.gov/5500Search/"
+    filing_started = time.time()
+    if status is None:
+        status = {}
+    error_class, error_message = None, None
+    
+    if cache is not None:
+        # Keep chromedriver's network log bounded over long crawls, whatever this filing's outcome
+        drain_network_log(driver)
     
     for attempt in range(1, max_retries + 1):
+        status["attempts"] = attempt
+        metrics.inc("efast2_attempts_total")
+        if attempt > 1:
+            metrics.inc("efast2_retries_total")
         try:
             print(f"Attempt {attempt}/{max_retries} - Navigating to EFAST2 search portal...")
+            step_started = time.time()
             driver.get(efast2_url)
             
             # Wait for page to load by checking for the presence of the search form
             WebDriverWait(driver, 2).until(
                 EC.presence_of_element_located((By.ID, "categoryType"))
             )
+            metrics.observe("efast2_step_seconds", time.time() - step_started, step="navigate")
             
             print("Page loaded. Looking for popup close button...")
             
@@ -391,6 +640,7 @@ def search_and_download_filing(driver, filing_id, max_retries=3):
                 print(f"Error handling popup: {e}")
             
             print("Setting search criteria...")
+            step_started = time.time()
             
             # Find and change the dropdown from default "Plan Name" to "ACK ID"
             category_dropdown = Select(driver.find_element(By.ID, "categoryType"))
@@ -444,13 +694,16 @@ def search_and_download_filing(driver, filing_id, max_retries=3):
             # Click the Search button to submit the search
             submit_button = driver.find_element(By.XPATH, "//button[@class='usa-button' and @type='submit']")
             submit_button.click()
+            metrics.observe("efast2_step_seconds", time.time() - step_started, step="fill_form")
             
             # Wait for search results to appear
             print("Waiting for search results...")
+            step_started = time.time()
             try:
                 WebDriverWait(driver, 10).until(  # Increased timeout
                     EC.presence_of_element_located((By.CLASS_NAME, "usa-table"))
                 )
+                metrics.observe("efast2_step_seconds", time.time() - step_started, step="results")
                 print("Search results table found")
                 
                 # Take a screenshot of the search results
@@ -460,6 +713,9 @@ def search_and_download_filing(driver, filing_id, max_retries=3):
                 tables = driver.find_elements(By.CLASS_NAME, "usa-table")
                 print(f"Found {len(tables)} tables with class 'usa-table'")
                 
+                # Reported if no result row leads to a download click below
+                error_class, error_message = "no_result_rows", "Results table has no data rows"
+                
                 if len(tables) > 0:
                     table = tables[0]
                     rows = table.find_elements(By.TAG_NAME, "tr")
@@ -473,18 +729,42 @@ def search_and_download_filing(driver, filing_id, max_retries=3):
                         cell_texts = [cell.text for cell in cells]
                         print(f"First row content: {cell_texts}")
                         
+                        if cache is not None:
+                            headers = [th.text.strip() for th in table.find_elements(By.TAG_NAME, "th")]
+                            cache_entry = {
+                                "row": row_to_dict(headers, [text.strip() for text in cell_texts]),
+                                "href": resolve_download_href(driver, first_row),
+                            }
+                        
+                            # Only the download request should be left to capture after the click
+                            drain_network_log(driver)
+                        
                         # Attempt to click the download icon
                         print("Attempting to click download icon...")
+                        step_started = time.time()
                         download_success = click_download_icon(driver)
+                        metrics.observe("efast2_step_seconds", time.time() - step_started, step="click_download")
                         if download_success:
+                            if cache is not None:
+                                if cache_entry["href"] is None:
+                                    cache_entry["href"] = captured_download_url(driver)
+                                cache.put_filing(filing_id, cache_entry)
+                            metrics.inc("efast2_filings_total", result="success")
+                            metrics.observe("efast2_filing_seconds", time.time() - filing_started)
+                            metrics.emit({"type": "filing", "filing_id": filing_id, "result": "success",
+                                          "attempts": attempt, "duration": time.time() - filing_started})
                             print("Download initiated successfully")
                             # We need to return immediately after a successful click to avoid interfering with the download
                             print("Download started - returning now to avoid interfering with the browser")
                             # IMPORTANT: Return immediately after successful download click
                             return True
                         else:
+                            error_class, error_message = "download_click_failed", "Could not click the download icon"
                             print("Failed to click download icon")
+                metrics.inc("efast2_errors_total", error=error_class)
             except TimeoutException:
+                error_class, error_message = "no_results", "Search results table not found within timeout"
+                metrics.inc("efast2_errors_total", error=error_class)
                 print("❌ Search results table not found within timeout")
                 take_debug_screenshot(driver, "no_search_results")
                 
@@ -497,9 +777,12 @@ def search_and_download_filing(driver, filing_id, max_retries=3):
                     print(f"Retrying in {2 ** attempt} seconds...")
                     time.sleep(2 ** attempt)
                     continue
-                return False
+                break
                 
         except (TimeoutException, NoSuchElementException) as e:
+            error_class = "page_timeout" if isinstance(e, TimeoutException) else "element_missing"
+            error_message = str(e).strip()
+            metrics.inc("efast2_errors_total", error=error_class)
             print(f"Error during attempt {attempt}: {str(e)}")
             if attempt < max_retries:
                 wait_time = 2 ** attempt
@@ -507,8 +790,32 @@ def search_and_download_filing(driver, filing_id, max_retries=3):
                 time.sleep(wait_time)
             else:
                 print("Maximum retry attempts reached. Giving up.")
-                return False
     
+    status["error_class"] = error_class
+    status["error"] = error_message
+    metrics.inc("efast2_filings_total", result="failed")
+    metrics.emit({"type": "filing", "filing_id": filing_id, "result": "failed", "error_class": error_class,
+                  "attempts": attempt, "duration": time.time() - filing_started})
+    return False
+
+def wait_for_download(download_dir, filing_id, timeout):
+    """
+    Wait for a completed download of the filing to land in the directory
+
+    Args:
+        download_dir (str): Directory the browser downloads into
+        filing_id (str): Filing ID expected in the file name
+        timeout (float): Seconds to wait
+
+    Returns:
+        bool: True if a .pdf or .zip for the filing appeared in time
+    """
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        for name in os.listdir(download_dir):
+            if name.startswith(filing_id) and name.endswith((".pdf", ".zip")):
+                return True
+        time.sleep(0.2)
     return False
 
 def extract_zip(zip_path, extract_to_dir):
@@ -528,8 +835,9 @@ def extract_zip(zip_path, extract_to_dir):
     print(f"Extracting ZIP file: {zip_path} to {extract_to_dir}")
     
     try:
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        with metrics.span("extract", zip_path=zip_path), zipfile.ZipFile(zip_path, 'r') as zip_ref:
             zip_ref.extractall(extract_to_dir)
+            metrics.inc("zip_members_extracted_total", len(zip_ref.namelist()))
         
         # Get a list of extracted PDF files
         pdf_files = [f for f in os.listdir(extract_to_dir) if f.lower().endswith('.pdf')]
@@ -545,12 +853,40 @@ def extract_zip(zip_path, extract_to_dir):
         print(f"Error extracting ZIP file: {e}")
         return []
 
-def main(filing_id=None):
+def run_search(query, category="Plan Name", efast2_url=EFAST2_SEARCH_URL, cache=None):
+    """
+    Search the portal (e.g. by sponsor name or EIN) and print the result rows
+    
+    Args:
+        query (str): Text to search for
+        category (str): Visible text of the search category dropdown option
+        efast2_url (str, optional): URL of the 5500 Search page
+        cache (FilingCache, optional): Search cache; a cached query does not start the browser
+    """
+    rows = cache.get_search(category, query) if cache is not None else None
+    if rows is not None:
+        print(f"Cache hit: {len(rows)} results for {category} '{query}'")
+    else:
+        driver = setup_browser("./downloads", True)
+        try:
+            rows = search_filings(driver, query, category, efast2_url)
+        finally:
+            driver.quit()
+        if cache is not None:
+            cache.put_search(category, query, rows)
+    
+    for row in rows:
+        print(" | ".join(f"{header}: {text}" for header, text in row.items()))
+
+def main(filing_id=None, efast2_url=EFAST2_SEARCH_URL, cache=None):
     """
     Main function to orchestrate the filing search, download, and extraction
     
     Args:
         filing_id (str, optional): Filing ID to search for and download
+        efast2_url (str, optional): URL of the 5500 Search page. Point this at
+                                    efast2_mock_server.py to run offline.
+        cache (FilingCache, optional): Search cache consulted before opening the portal
     """
     # Default filing ID if none provided
     if not filing_id:
@@ -564,29 +900,37 @@ def main(filing_id=None):
     print(f"Starting EFAST2 scraper for filing ID: {filing_id}")
     print(f"Downloads will be saved to: {downloads_abs_path}")
     
-    # Clear any existing files with the same name
-    for extension in ['.zip', '.pdf']:
-        potential_file_path = os.path.join(downloads_abs_path, f"{filing_id}{extension}")
-        if os.path.exists(potential_file_path):
-            print(f"Removing existing file: {potential_file_path}")
-            try:
-                os.remove(potential_file_path)
-            except Exception as e:
-                print(f"Error removing existing file: {e}")
-    
-    # Setup browser - using non-headless mode for better download handling
-    driver = setup_browser(downloads_abs_path, False)
+    driver = None
     
     try:
-        # Search and download filing
-        success = search_and_download_filing(driver, filing_id)
+        # A cached filing is served without starting the browser
+        success = cache is not None and download_from_cache(cache, filing_id, downloads_abs_path)
+        
+        if not success:
+            # Clear any existing files with the same name
+            for extension in ['.zip', '.pdf']:
+                potential_file_path = os.path.join(downloads_abs_path, f"{filing_id}{extension}")
+                if os.path.exists(potential_file_path):
+                    print(f"Removing existing file: {potential_file_path}")
+                    try:
+                        os.remove(potential_file_path)
+                    except Exception as e:
+                        print(f"Error removing existing file: {e}")
+            
+            # Setup browser - using non-headless mode for better download handling
+            driver = setup_browser(downloads_abs_path, False, capture_downloads=cache is not None)
+            
+            # Search and download filing
+            success = search_and_download_filing(driver, filing_id, efast2_url=efast2_url, cache=cache)
         
         if success:
-            print("Download was initiated successfully")
-            print("Waiting for download to complete...")
+            if driver:
+                print("Download was initiated successfully")
+                print("Waiting for download to complete...")
 
-            # Wait longer for downloads to complete
-            time.sleep(10)
+                # Wait for the file to land in this run's download directory
+                if not wait_for_download(downloads_abs_path, filing_id, 60):
+                    print(f"No completed download for {filing_id} after 60 seconds")
             
             # Check for downloaded files
             downloaded_files = os.listdir(downloads_abs_path)
@@ -628,16 +972,40 @@ def main(filing_id=None):
         if driver:
             take_debug_screenshot(driver, "final_state")
             
-        # Clean up WebDriver instance
-        print("Closing browser...")
-        driver.quit()
+            # Clean up WebDriver instance
+            print("Closing browser...")
+            driver.quit()
+        
 
 if __name__ == "__main__":
     # Parse command line arguments
     parser = argparse.ArgumentParser(description="EFAST2 Form 5500 Filing Scraper")
     parser.add_argument("--filing-id", type=str, help="Filing ID (ACK_ID) to search for and download")
+    parser.add_argument("--url", type=str, default=EFAST2_SEARCH_URL,
+                        help="URL of the 5500 Search page (default: live DOL portal)")
+    parser.add_argument("--screenshot-dir", type=str, default=SCREENSHOT_DIR,
+                        help="Directory for debug screenshots (default: current directory)")
+    parser.add_argument("--no-screenshots", action="store_true", help="Do not take debug screenshots")
+    parser.add_argument("--search", type=str,
+                        help="Instead of downloading a filing, search the portal for this text and list the results")
+    parser.add_argument("--category", type=str, default="Plan Name",
+                        help="Search category for --search, e.g. 'Sponsor Name' or 'EIN' (default: Plan Name)")
+    add_cache_arguments(parser)
+    add_metrics_arguments(parser)
     
     args = parser.parse_args()
     
-    # Call main function with command line arguments
-    main(filing_id=args.filing_id)
\ No newline at end of file
+    SCREENSHOT_DIR = None if args.no_screenshots else args.screenshot_dir
+    metrics.configure(jsonl_path=args.metrics_jsonl, port=args.metrics_port)
+    cache = cache_from_args(args)
+    try:
+        # Call main function with command line arguments
+        if args.search:
+            run_search(args.search, args.category, efast2_url=args.url, cache=cache)
+        else:
+            main(filing_id=args.filing_id, efast2_url=args.url, cache=cache)
+    finally:
+        if cache is not None:
+            print(f"Search cache: {format_stats(cache.stats())}")
+            cache.close()
+        metrics.close()
\ No newline at end of file
@@ -7,12 +7,27 @@ from the Department of Labor, focusing on finding matches for a specific sponsor
 """
 
 import os
+import heapq
 import requests
 import zipfile
 import pandas as pd
 from rapidfuzz import fuzz, process
 import argparse
 
+from instrumentation import metrics, Progress, add_metrics_arguments
+
+# DOL publishes one "Latest" ZIP per plan year and form/schedule
+DATASET_URL_TEMPLATE = "https://askebsa.dol.gov/FOIA%20Files/{year}/Latest/F_5500_{year}_Latest.zip"
+
+def dataset_url(year):
+    """Return the URL of the main Form 5500 dataset for a plan year"""
+    return DATASET_URL_TEMPLATE.format(year=year)
+
+def schedule_a_url(zip_url):
+    """Return the URL of the Schedule A dataset published alongside a main Form 5500 dataset"""
+    directory, filename = zip_url.rsplit("/", 1)
+    return f"{directory}/{filename.replace('F_5500_', 'F_SCH_A_', 1)}"
+
 def download_file(url, output_path):
     """
     Download a file from URL to the specified output path
@@ -28,7 +43,7 @@ def download_file(url, output_path):
     
     try:
         # Stream the download to handle large files
-        with requests.get(url, stream=True) as response:
+        with metrics.span("download", url=url) as span, requests.get(url, stream=True) as response:
             response.raise_for_status()
             
             # Get total file size for progress reporting
@@ -37,25 +52,26 @@ def download_file(url, output_path):
             # Create directory if it doesn't exist
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
             
-            # Write the file in chunks
+            # Write the file in chunks, redrawing progress at most once per second
+            progress = Progress("Download progress", total_size)
             with open(output_path, 'wb') as f:
                 downloaded = 0
-                chunk_size = 8192  # 8KB chunks
+                chunk_size = 1024 * 1024  # 1MB chunks
                 
                 for chunk in response.iter_content(chunk_size=chunk_size):
                     if chunk:
                         f.write(chunk)
                         downloaded += len(chunk)
-                        
-                        # Print progress
-                        if total_size > 0:
-                            percent = (downloaded / total_size) * 100
-                            print(f"Download progress: {percent:.1f}% ({downloaded}/{total_size} bytes)", end='\r')
+                        progress.update(downloaded)
             
-            print("\nDownload completed successfully!")
+            progress.finish(downloaded)
+            metrics.inc("bytes_downloaded_total", downloaded)
+            span["bytes"] = downloaded
+            print("Download completed successfully!")
             return True
             
     except requests.exceptions.RequestException as e:
+        metrics.inc("download_errors_total")
         print(f"Error downloading file: {e}")
         return False
 
@@ -78,18 +94,20 @@ def extract_zip(zip_path, extract_to_folder):
         
         extracted_files = []
         
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        with metrics.span("extract", zip_path=zip_path) as span, zipfile.ZipFile(zip_path, 'r') as zip_ref:
             # Get list of files in the ZIP
             file_list = zip_ref.namelist()
             print(f"ZIP contains {len(file_list)} files")
             
             # Extract all files
             for file in file_list:
-                print(f"Extracting: {file}")
                 zip_ref.extract(file, extract_to_folder)
                 extracted_files.append(os.path.join(extract_to_folder, file))
+            
+            metrics.inc("zip_members_extracted_total", len(file_list))
+            span["members"] = len(file_list)
         
-        print("Extraction completed successfully!")
+        print(f"Extraction completed successfully! ({len(extracted_files)} files)")
         return extracted_files
         
     except zipfile.BadZipFile as e:
@@ -99,6 +117,81 @@ def extract_zip(zip_path, extract_to_folder):
         print(f"Error extracting ZIP file: {e}")
         return []
 
+def dataset_paths(zip_url, data_dir="data"):
+    """
+    Compute the local ZIP path and extraction folder for a dataset URL
+    
+    Args:
+        zip_url (str): URL of the Form 5500 dataset ZIP file
+        data_dir (str): Root directory for downloaded data
+    
+    Returns:
+        tuple: (zip_path, extract_folder)
+    """
+    # Extract filename from URL for the local save path
+    filename = os.path.basename(zip_url)
+    zip_path = os.path.join(data_dir, filename)
+    extract_folder = os.path.join(data_dir, "extracted", filename.replace(".zip", ""))
+    return zip_path, extract_folder
+
+def prepare_dataset(zip_url, data_dir="data"):
+    """
+    Download (if needed) and extract a dataset ZIP, returning its CSV path
+    
+    Args:
+        zip_url (str): URL of the Form 5500 dataset ZIP file
+        data_dir (str): Root directory for downloaded data
+    
+    Returns:
+        str: Path to the extracted CSV file, or None on failure
+    """
+    zip_path, extract_folder = dataset_paths(zip_url, data_dir)
+    
+    # Step 1: Download the ZIP file if it doesn't already exist
+    if not os.path.exists(zip_path):
+        if not download_file(zip_url, zip_path):
+            print("Failed to download the ZIP file.")
+            return None
+    else:
+        print(f"ZIP file already exists at {zip_path}, skipping download")
+    
+    # Step 2: Extract the ZIP file
+    extracted_files = extract_zip(zip_path, extract_folder)
+    if not extracted_files:
+        print("Failed to extract any files from the ZIP.")
+        return None
+    
+    # Find the CSV file in the extracted files
+    csv_files = [f for f in extracted_files if f.lower().endswith('.csv')]
+    if not csv_files:
+        print("No CSV files found in the extracted ZIP.")
+        return None
+    
+    csv_path = csv_files[0]  # Use the first CSV file
+    print(f"Using CSV file: {csv_path}")
+    return csv_path
+
+def load_csv(csv_path, **read_options):
+    """
+    Load a Form 5500 dataset CSV
+    
+    Args:
+        csv_path (str): Path to the CSV file
+        **read_options: Extra keyword arguments for pandas.read_csv
+    
+    Returns:
+        DataFrame: Dataset rows
+    """
+    # Load the CSV file with appropriate settings for large files
+    print("Loading CSV data (this may take a while for large files)...")
+    with metrics.span("parse_csv", csv_path=csv_path) as span:
+        df = pd.read_csv(csv_path, low_memory=False, **read_options)
+        span["rows"] = len(df)
+    metrics.inc("rows_parsed_total", len(df))
+    
+    print(f"Loaded {len(df)} rows.")
+    return df
+
 def find_matching_rows(csv_path, target_name, similarity_threshold=80):
     """
     Find rows in the CSV where sponsor name matches the target name using fuzzy matching
@@ -115,11 +208,9 @@ def find_matching_rows(csv_path, target_name, similarity_threshold=80):
     print(f"Searching for sponsor names similar to: {target_name}")
     
     try:
-        # Load the CSV file with appropriate settings for large files
-        print("Loading CSV data (this may take a while for large files)...")
-        df = pd.read_csv(csv_path, low_memory=False)
+        df = load_csv(csv_path)
         
-        print(f"Loaded {len(df)} rows. Starting fuzzy matching...")
+        print("Starting fuzzy matching...")
         
         # Function to calculate similarity score for each sponsor name
         def calculate_similarity(name):
@@ -128,10 +219,13 @@ def find_matching_rows(csv_path, target_name, similarity_threshold=80):
             return fuzz.ratio(name.upper(), target_name.upper())
         
         # Add a similarity score column
-        df['similarity_score'] = df['SPONSOR_DFE_NAME'].apply(calculate_similarity)
-        
-        # Filter rows based on similarity threshold
-        matches = df[df['similarity_score'] >= similarity_threshold]
+        with metrics.span("score", target=target_name) as span:
+            df['similarity_score'] = df['SPONSOR_DFE_NAME'].apply(calculate_similarity)
+            
+            # Filter rows based on similarity threshold
+            matches = df[df['similarity_score'] >= similarity_threshold]
+            span["matches"] = len(matches)
+        metrics.inc("rows_scored_total", len(df))
         
         print(f"Found {len(matches)} matches with similarity ≥ {similarity_threshold}%")
         return matches
@@ -140,7 +234,246 @@ def find_matching_rows(csv_path, target_name, similarity_threshold=80):
         print(f"Error processing CSV file: {e}")
         return pd.DataFrame()
 
-def main(zip_url=None, target_sponsor=None):
+def rank_sponsor_names(names, target_name, top_k=10, similarity_threshold=80):
+    """
+    Find the top K sponsor names most similar to the target name
+    
+    Keeps a min-heap of the best K scores seen so far. Once the heap is full its
+    smallest score becomes the score_cutoff passed to rapidfuzz, which abandons
+    candidates that cannot beat it instead of computing their full similarity.
+    
+    Args:
+        names (iterable): Distinct sponsor names to rank
+        target_name (str): Name to match against
+        top_k (int): Number of names to return
+        similarity_threshold (int): Minimum similarity score (0-100) to consider a match
+    
+    Returns:
+        list: (name, score) tuples sorted by descending score
+    """
+    if top_k < 1:
+        return []
+    
+    target = target_name.upper()
+    heap = []
+    cutoff = similarity_threshold
+    
+    for name in names:
+        if not isinstance(name, str):
+            continue
+        score = fuzz.ratio(name.upper(), target, score_cutoff=cutoff)
+        if score < cutoff:
+            continue
+        if len(heap) < top_k:
+            heapq.heappush(heap, (score, name))
+            if len(heap) == top_k:
+                cutoff = heap[0][0]
+        elif score > heap[0][0]:
+            heapq.heapreplace(heap, (score, name))
+            cutoff = heap[0][0]
+    
+    return [(name, score) for score, name in sorted(heap, key=lambda item: (-item[0], item[1]))]
+
+def select_filings(df, ranked_names):
+    """
+    Select the filings for ranked sponsor names without copying the full frame
+    
+    Args:
+        df (DataFrame): Dataset rows
+        ranked_names (list): (name, score) tuples from rank_sponsor_names
+    
+    Returns:
+        DataFrame: Filings of the ranked sponsors with a similarity_score column,
+                   sorted by descending score
+    """
+    scores = dict(ranked_names)
+    sponsor_names = df['SPONSOR_DFE_NAME']
+    filings = df.loc[sponsor_names.isin(scores.keys())]
+    filings = filings.assign(similarity_score=filings['SPONSOR_DFE_NAME'].map(scores))
+    return filings.sort_values(['similarity_score', 'SPONSOR_DFE_NAME'], ascending=[False, True], kind='stable')
+
+def find_top_matches(csv_path, target_name, top_k=10, similarity_threshold=80):
+    """
+    Find the filings of the K distinct sponsor names closest to the target name
+    
+    Args:
+        csv_path (str): Path to the CSV file
+        target_name (str): Name to match against sponsor names
+        top_k (int): Number of distinct sponsor names to return
+        similarity_threshold (int): Minimum similarity score (0-100) to consider a match
+    
+    Returns:
+        DataFrame: Filings of the top K sponsors, sorted by descending score
+    """
+    print(f"Processing CSV file: {csv_path}")
+    print(f"Searching for the top {top_k} sponsor names similar to: {target_name}")
+    
+    try:
+        df = load_csv(csv_path)
+        
+        with metrics.span("rank", target=target_name, top_k=top_k) as span:
+            names = df['SPONSOR_DFE_NAME'].dropna().unique()
+            ranked = rank_sponsor_names(names, target_name, top_k, similarity_threshold)
+            matches = select_filings(df, ranked)
+            span["names"] = len(names)
+            span["matches"] = len(matches)
+        metrics.inc("rows_scored_total", len(names))
+        
+        print(f"Found {len(ranked)} sponsor names ({len(matches)} filings) with similarity ≥ {similarity_threshold}%")
+        return matches
+        
+    except Exception as e:
+        print(f"Error processing CSV file: {e}")
+        return pd.DataFrame()
+
+# Columns shown when printing matches to the console, in display order
+DISPLAY_COLUMNS = ['SPONSOR_DFE_NAME', 'ACK_ID', 'SPONS_DFE_EIN', 'EIN', 'PLAN_YEAR', 'similarity_score']
+
+# Sponsor EIN column names, in order of preference (SPONS_DFE_EIN in current DOL layouts)
+EIN_COLUMNS = ['SPONS_DFE_EIN', 'EIN']
+
+def ein_column(df):
+    """Return the name of the sponsor EIN column in the dataset, or None"""
+    return next((column for column in EIN_COLUMNS if column in df.columns), None)
+
+def write_results(matches, output_path):
+    """
+    Write matches in one pass as CSV or JSON, chosen by the file extension
+    
+    Args:
+        matches (DataFrame): Matching rows
+        output_path (str): Destination path ending in .csv or .json
+    """
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    if output_path.lower().endswith('.json'):
+        matches.to_json(output_path, orient='records', indent=2)
+    else:
+        matches.to_csv(output_path, index=False)
+    print(f"Wrote {len(matches)} matching rows to {output_path}")
+
+def print_results(matches):
+    """Print the key columns of the matches as a single table"""
+    columns = [c for c in DISPLAY_COLUMNS if c in matches.columns]
+    print(matches[columns].to_string(index=False))
+
+# Schedule A amount columns summed per sponsor and year, keyed by output name.
+# Welfare contracts report premium in Part III line 9 when experience-rated and
+# line 10a otherwise; 'premiums' is the sum of both.
+SCHEDULE_A_SUM_COLUMNS = {
+    'experience_rated_premiums': 'WLFR_TOT_EARNED_PREM_AMT',
+    'non_experience_rated_premiums': 'WLFR_TOT_CHARGES_PAID_AMT',
+    'broker_commissions': 'INS_BROKER_COMM_TOT_AMT',
+    'broker_fees': 'INS_BROKER_FEES_TOT_AMT',
+}
+SCHEDULE_A_PREMIUM_COLUMNS = ['experience_rated_premiums', 'non_experience_rated_premiums']
+# Persons covered per contract; the same people appear on every contract of a filing
+SCHEDULE_A_COVERED_COLUMN = 'INS_PRSN_COVERED_EOY_CNT'
+SCHEDULE_A_CARRIER_COLUMN = 'INS_CARRIER_NAME'
+
+def load_schedule_a(csv_path):
+    """
+    Load the Schedule A columns needed for premium aggregation
+    
+    Args:
+        csv_path (str): Path to the Schedule A CSV file
+    
+    Returns:
+        DataFrame: ACK_ID, carrier name and numeric amount columns
+    """
+    wanted = {'ACK_ID', SCHEDULE_A_CARRIER_COLUMN, SCHEDULE_A_COVERED_COLUMN, *SCHEDULE_A_SUM_COLUMNS.values()}
+    
+    print("Loading Schedule A data...")
+    with metrics.span("parse_csv", csv_path=csv_path) as span:
+        sch_a = pd.read_csv(csv_path, usecols=lambda column: column in wanted, low_memory=False)
+        span["rows"] = len(sch_a)
+    metrics.inc("rows_parsed_total", len(sch_a))
+    
+    for column in [*SCHEDULE_A_SUM_COLUMNS.values(), SCHEDULE_A_COVERED_COLUMN]:
+        if column in sch_a.columns:
+            sch_a[column] = pd.to_numeric(sch_a[column], errors='coerce')
+    
+    print(f"Loaded {len(sch_a)} Schedule A rows.")
+    return sch_a
+
+def plan_year(df):
+    """Return the plan year of each main-form row, or None if it cannot be derived"""
+    if 'PLAN_YEAR' in df.columns:
+        return df['PLAN_YEAR']
+    if 'FORM_PLAN_YEAR_BEGIN_DATE' in df.columns:
+        return pd.to_datetime(df['FORM_PLAN_YEAR_BEGIN_DATE'], errors='coerce').dt.year.astype('Int64')
+    return None
+
+def aggregate_schedule_a(matches, sch_a):
+    """
+    Join Schedule A rows to matched filings and aggregate per sponsor and year
+    
+    Args:
+        matches (DataFrame): Matched main Form 5500 rows (must include ACK_ID)
+        sch_a (DataFrame): Schedule A rows from load_schedule_a
+    
+    Returns:
+        DataFrame: One row per sponsor/EIN/plan year with summed premiums (total
+                   and by experience rating), broker commissions and fees,
+                   covered lives (largest contract of each filing, summed over
+                   filings), distinct carrier count and carrier names
+    """
+    # Keep only the join key and grouping columns of the matched filings
+    keys = pd.DataFrame({'ACK_ID': matches['ACK_ID'], 'SPONSOR_DFE_NAME': matches['SPONSOR_DFE_NAME']})
+    group_columns = ['SPONSOR_DFE_NAME']
+    column = ein_column(matches)
+    if column:
+        keys['EIN'] = matches[column]
+        group_columns.append('EIN')
+    years = plan_year(matches)
+    if years is not None:
+        keys['PLAN_YEAR'] = years
+        group_columns.append('PLAN_YEAR')
+    keys = keys.drop_duplicates('ACK_ID').set_index('ACK_ID')
+    
+    with metrics.span("aggregate_schedule_a", filings=len(keys)) as span:
+        # Indexed merge: each Schedule A row picks up its filing's sponsor keys
+        joined = sch_a.join(keys, on='ACK_ID', how='inner')
+        span["schedules"] = len(joined)
+        
+        sums = {name: (source, 'sum') for name, source in SCHEDULE_A_SUM_COLUMNS.items() if source in joined.columns}
+        grouped = joined.groupby(group_columns, dropna=False, sort=True)
+        summary = grouped.agg(
+            filings=('ACK_ID', 'nunique'),
+            schedules=('ACK_ID', 'size'),
+            **sums,
+        )
+        # A group with no reported values is missing, not zero
+        for name, (source, _) in sums.items():
+            summary[name] = summary[name].where(grouped[source].count() > 0)
+        premium_columns = [name for name in SCHEDULE_A_PREMIUM_COLUMNS if name in summary.columns]
+        if premium_columns:
+            summary.insert(2, 'premiums', summary[premium_columns].sum(axis=1, min_count=1))
+        
+        if SCHEDULE_A_COVERED_COLUMN in joined.columns:
+            # Contracts of one filing cover the same participants, so count each filing once
+            per_filing = joined.groupby('ACK_ID')[SCHEDULE_A_COVERED_COLUMN].max()
+            covered = keys.join(per_filing, how='inner').groupby(group_columns, dropna=False)
+            summary['covered_lives'] = covered[SCHEDULE_A_COVERED_COLUMN].sum(min_count=1)
+        
+        if SCHEDULE_A_CARRIER_COLUMN in joined.columns:
+            carriers = joined[group_columns + [SCHEDULE_A_CARRIER_COLUMN]].dropna(subset=[SCHEDULE_A_CARRIER_COLUMN])
+            carriers = carriers.drop_duplicates().sort_values(SCHEDULE_A_CARRIER_COLUMN)
+            carrier_groups = carriers.groupby(group_columns, dropna=False)[SCHEDULE_A_CARRIER_COLUMN]
+            summary['carriers'] = carrier_groups.size()
+            summary['carrier_names'] = carrier_groups.agg('; '.join)
+            summary['carriers'] = summary['carriers'].fillna(0).astype(int)
+    
+    return summary.reset_index()
+
+def positive_int(value):
+    """argparse type for options that must be at least 1"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+def main(zip_url=None, target_sponsor=None, similarity_threshold=80, top_k=None, output_path=None,
+         schedule_a=False):
     """
     Main function to orchestrate the download, extraction, and analysis process
     
@@ -149,62 +482,58 @@ def main(zip_url=None, target_sponsor=None):
                                 Defaults to 2023 dataset if not provided.
         target_sponsor (str, optional): Name of the sponsor to search for.
                                        Defaults to THE INTERSECT GROUP if not provided.
+        similarity_threshold (int): Minimum similarity score (0-100) to consider a match
+        top_k (int, optional): Return only the filings of the K best sponsor names,
+                               ranked by similarity
+        output_path (str, optional): Write matches to this .csv or .json file
+        schedule_a (bool): Join the matches to the Schedule A dataset and output
+                           per-sponsor, per-year premium and broker fee totals
+                           instead of the individual filings
     """
     # Set default values if parameters not provided
     if zip_url is None:
-        zip_url = "https://askebsa.dol.gov/FOIA%20Files/2023/Latest/F_5500_2023_Latest.zip"
+        zip_url = dataset_url(2023)
     
     if target_sponsor is None:
         target_sponsor = "THE INTERSECT GROUP"
     
-    # Define file paths
-    data_dir = "data"
-    
-    # Extract filename from URL for the local save path
-    filename = os.path.basename(zip_url)
-    zip_path = os.path.join(data_dir, filename)
-    extract_folder = os.path.join(data_dir, "extracted", filename.replace(".zip", ""))
-    
     print(f"Starting Form 5500 data analysis")
     print(f"Target sponsor: {target_sponsor}")
     print(f"Dataset URL: {zip_url}")
     
-    # Step 1: Download the ZIP file if it doesn't already exist
-    if not os.path.exists(zip_path):
-        if not download_file(zip_url, zip_path):
-            print("Failed to download the ZIP file. Exiting.")
-            return
-    else:
-        print(f"ZIP file already exists at {zip_path}, skipping download")
-    
-    # Step 2: Extract the ZIP file
-    extracted_files = extract_zip(zip_path, extract_folder)
-    if not extracted_files:
-        print("Failed to extract any files from the ZIP. Exiting.")
+    # Steps 1-2: Download and extract the dataset
+    csv_path = prepare_dataset(zip_url)
+    if csv_path is None:
+        print("Exiting.")
         return
     
-    # Find the CSV file in the extracted files
-    csv_files = [f for f in extracted_files if f.lower().endswith('.csv')]
-    if not csv_files:
-        print("No CSV files found in the extracted ZIP. Exiting.")
-        return
+    # Step 3: Find matching rows in the CSV
+    if top_k:
+        matches = find_top_matches(csv_path, target_sponsor, top_k, similarity_threshold)
+    else:
+        matches = find_matching_rows(csv_path, target_sponsor, similarity_threshold)
     
-    csv_path = csv_files[0]  # Use the first CSV file
-    print(f"Using CSV file: {csv_path}")
+    # Step 3b: Aggregate Schedule A premiums for the matched filings
+    if schedule_a and len(matches) > 0:
+        sch_a_url = schedule_a_url(zip_url)
+        print(f"Schedule A dataset URL: {sch_a_url}")
+        sch_a_csv_path = prepare_dataset(sch_a_url)
+        if sch_a_csv_path is None:
+            print("Exiting.")
+            return
+        matches = aggregate_schedule_a(matches, load_schedule_a(sch_a_csv_path))
+        print(f"Aggregated Schedule A totals for {len(matches)} sponsor/year groups")
     
-    # Step 3: Find matching rows in the CSV
-    matches = find_matching_rows(csv_path, target_sponsor)
-    
-    # Step 4: Display the results
-    if len(matches) > 0:
-        print("\nMatching sponsor entries:")
-        for index, row in matches.iterrows():
-            print("\n" + "="*50)
-            print(f"Sponsor Name: {row.get('SPONSOR_DFE_NAME', 'N/A')}")
-            print(f"Filing ID: {row.get('ACK_ID', 'N/A')}")
-            print(f"EIN: {row.get('EIN', 'N/A')}")
-            print(f"Plan Year: {row.get('PLAN_YEAR', 'N/A')}")
-            print(f"Similarity Score: {row.get('similarity_score', 'N/A')}%")
+    # Step 4: Output the results
+    if schedule_a and len(matches) > 0 and not output_path:
+        print("\nSchedule A totals:")
+        print(matches.to_string(index=False))
+    elif len(matches) > 0:
+        if output_path:
+            write_results(matches, output_path)
+        else:
+            print("\nMatching sponsor entries:")
+            print_results(matches)
     else:
         print("\nNo matching sponsors found.")
     
@@ -217,9 +546,20 @@ if __name__ == "__main__":
     parser.add_argument("--sponsor", type=str, help="Target sponsor name to search for")
     parser.add_argument("--threshold", type=int, default=80, 
                         help="Minimum similarity threshold (0-100) for name matching (default: 80)")
+    parser.add_argument("--top-k", type=positive_int,
+                        help="Return only the filings of the K most similar sponsor names, ranked by score")
+    parser.add_argument("--output", type=str, help="Write matches to this .csv or .json file")
+    parser.add_argument("--schedule-a", action="store_true",
+                        help="Aggregate Schedule A premiums, broker fees, carriers and covered lives per sponsor and year")
+    add_metrics_arguments(parser)
     
     # Parse command line arguments
     args = parser.parse_args()
     
-    # Call main function with command line arguments
-    main(zip_url=args.url, target_sponsor=args.sponsor)
\ No newline at end of file
+    metrics.configure(jsonl_path=args.metrics_jsonl, port=args.metrics_port)
+    try:
+        # Call main function with command line arguments
+        main(zip_url=args.url, target_sponsor=args.sponsor, similarity_threshold=args.threshold,
+             top_k=args.top_k, output_path=args.output, schedule_a=args.schedule_a)
+    finally:
+        metrics.close()
\ No newline at end of file
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Form 5500 Delta Ingestion
+
+Refreshes local copies of the DOL "Latest" datasets, which are regenerated as
+amended and late filings arrive. A new ZIP is only downloaded when the published
+file has changed, and is then diffed against the previously ingested version by
+ACK_ID and row hash. Only added, changed and removed filings are applied to the
+local cache, and a change log records which sponsors gained new filings.
+"""
+
+import os
+import json
+import time
+import shutil
+import argparse
+
+import pandas as pd
+import requests
+
+from form5500_analysis import (
+    dataset_url, dataset_paths, download_file, extract_zip, prepare_dataset, load_csv,
+    ein_column, write_results,
+)
+from instrumentation import metrics, add_metrics_arguments
+
+CHANGES = ["added", "changed", "removed"]
+
+# Strings pandas.read_csv treats as missing by default
+NA_STRINGS = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+]
+
+
+def cache_paths(zip_url, data_dir="data"):
+    """
+    Compute the cache file paths for a dataset
+
+    Returns:
+        dict: Paths of the cached rows ('rows'), ACK_ID row hashes ('hashes')
+              and ingestion state ('state')
+    """
+    name = os.path.basename(zip_url).replace(".zip", "")
+    cache_dir = os.path.join(data_dir, "cache")
+    return {
+        "rows": os.path.join(cache_dir, f"{name}.pkl"),
+        "hashes": os.path.join(cache_dir, f"{name}_hashes.pkl"),
+        "state": os.path.join(cache_dir, f"{name}_state.json"),
+    }
+
+
+def load_state(paths):
+    """Load the ingestion state of a dataset, or an empty dict if never ingested"""
+    if not os.path.exists(paths["state"]):
+        return {}
+    with open(paths["state"], "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def cache_is_current(zip_url, data_dir="data"):
+    """
+    Return True if the cached rows of a dataset can be used in place of its CSV
+
+    The cache must hold typed rows and be at least as new as the local ZIP; a ZIP
+    downloaded after the last ingestion is read directly instead.
+    """
+    paths = cache_paths(zip_url, data_dir)
+    zip_path, _ = dataset_paths(zip_url, data_dir)
+    if not os.path.exists(paths["rows"]) or not load_state(paths).get("typed_rows", False):
+        return False
+    return not os.path.exists(zip_path) or os.path.getmtime(paths["rows"]) >= os.path.getmtime(zip_path)
+
+
+def load_rows(zip_url, data_dir="data", **read_options):
+    """
+    Load the rows of a dataset, preferring the delta ingestion cache when it is current
+
+    The cache already has every delta applied and loads much faster than
+    extracting and parsing the CSV.
+
+    Args:
+        zip_url (str): URL of the dataset ZIP file
+        data_dir (str): Root directory for downloaded data
+        **read_options: Passed to load_csv when the CSV is read (e.g. usecols)
+
+    Returns:
+        DataFrame: Dataset rows, or None if the dataset could not be prepared
+    """
+    if cache_is_current(zip_url, data_dir):
+        rows_path = cache_paths(zip_url, data_dir)["rows"]
+        print(f"Loading cached rows from {rows_path}")
+        df = pd.read_pickle(rows_path)
+        metrics.inc("rows_parsed_total", len(df))
+        return df
+
+    csv_path = prepare_dataset(zip_url, data_dir)
+    if csv_path is None:
+        return None
+    return load_csv(csv_path, **read_options)
+
+
+def write_atomically(path, write):
+    """Write a file through a temporary path so readers never see it half written"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    partial_path = path + ".tmp"
+    write(partial_path)
+    os.replace(partial_path, path)
+
+
+def remote_version(zip_url):
+    """
+    Fetch the published version markers of a dataset ZIP with a HEAD request
+
+    Returns:
+        dict: Last-Modified, ETag and Content-Length headers (None when absent),
+              or an empty dict if the request failed
+    """
+    try:
+        response = requests.head(zip_url, allow_redirects=True, timeout=30)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print(f"Could not check remote version: {e}")
+        return {}
+    return {
+        "last_modified": response.headers.get("Last-Modified"),
+        "etag": response.headers.get("ETag"),
+        "content_length": response.headers.get("Content-Length"),
+    }
+
+
+def is_unchanged(state, version):
+    """Return True if the remote version markers match the last ingested ones"""
+    if not state or not version:
+        return False
+    markers = [key for key in ("etag", "last_modified", "content_length") if version.get(key)]
+    return bool(markers) and all(state.get(key) == version[key] for key in markers)
+
+
+def row_hashes(df):
+    """
+    Hash every row of a dataset
+
+    Returns:
+        DataFrame: ACK_ID and ROW_HASH (uint64) per row, last row kept for
+                   duplicate ACK_IDs
+    """
+    with metrics.span("hash_rows", rows=len(df)):
+        hashes = pd.util.hash_pandas_object(df, index=False)
+    return (pd.DataFrame({"ACK_ID": df["ACK_ID"].to_numpy(), "ROW_HASH": hashes.to_numpy()})
+            .drop_duplicates("ACK_ID", keep="last"))
+
+
+def diff_datasets(old_hashes, new_hashes):
+    """
+    Compare two versions of a dataset by ACK_ID and row hash
+
+    Args:
+        old_hashes (DataFrame): ACK_ID/ROW_HASH of the previously ingested version
+        new_hashes (DataFrame): ACK_ID/ROW_HASH of the new version
+
+    Returns:
+        dict: 'added', 'changed' and 'removed' Index objects of ACK_IDs
+    """
+    merged = old_hashes.merge(new_hashes, on="ACK_ID", how="outer",
+                              suffixes=("_OLD", "_NEW"), indicator=True)
+    both = merged["_merge"] == "both"
+    return {
+        "added": pd.Index(merged.loc[merged["_merge"] == "right_only", "ACK_ID"]),
+        "changed": pd.Index(merged.loc[both & (merged["ROW_HASH_OLD"] != merged["ROW_HASH_NEW"]), "ACK_ID"]),
+        "removed": pd.Index(merged.loc[merged["_merge"] == "left_only", "ACK_ID"]),
+    }
+
+
+def typed_rows(text_rows, dtypes=None):
+    """
+    Convert rows read as text to the types load_csv would give them
+
+    Args:
+        text_rows (DataFrame): Rows read with dtype=str, keep_default_na=False
+        dtypes (Series, optional): Column dtypes of the cached rows. Columns cached
+                                   as text stay text; other columns are converted
+                                   to numbers when every value parses, as
+                                   read_csv does.
+
+    Returns:
+        DataFrame: Typed rows with missing values as NaN
+    """
+    typed = {}
+    for column in text_rows.columns:
+        values = text_rows[column].where(~text_rows[column].isin(NA_STRINGS))
+        if dtypes is not None and column in dtypes.index and not pd.api.types.is_numeric_dtype(dtypes[column]):
+            typed[column] = values
+            continue
+        try:
+            typed[column] = pd.to_numeric(values)
+        except (ValueError, TypeError):
+            typed[column] = values
+    return pd.DataFrame(typed, index=text_rows.index)
+
+
+def apply_delta(cached, incoming, delta):
+    """
+    Apply a delta to the cached rows
+
+    Removed and changed filings are dropped from the cache and the new versions
+    of added and changed filings are appended; unchanged rows are not touched.
+
+    Args:
+        cached (DataFrame): Typed rows of the previously ingested version
+        incoming (DataFrame): Typed rows of the added and changed filings
+        delta (dict): Output of diff_datasets
+
+    Returns:
+        DataFrame: Updated cache
+    """
+    stale = delta["changed"].append(delta["removed"])
+    kept = cached.loc[~cached["ACK_ID"].isin(stale)]
+    return pd.concat([kept, incoming], ignore_index=True)
+
+
+def sponsor_change_log(old_rows, new_df, delta):
+    """
+    Summarize a delta per sponsor
+
+    Returns:
+        DataFrame: One row per sponsor and change type (added/changed/removed)
+                   with the number of filings and their ACK_IDs, sponsors with
+                   new filings first
+    """
+    frames = []
+    for change, source in (("added", new_df), ("changed", new_df), ("removed", old_rows)):
+        if len(delta[change]) == 0 or source is None:
+            continue
+        rows = source.loc[source["ACK_ID"].isin(delta[change])]
+        log = pd.DataFrame({"SPONSOR_DFE_NAME": rows["SPONSOR_DFE_NAME"], "ACK_ID": rows["ACK_ID"]})
+        column = ein_column(rows)
+        log["EIN"] = rows[column] if column else None
+        log["change"] = change
+        frames.append(log)
+
+    if not frames:
+        return pd.DataFrame(columns=["change", "SPONSOR_DFE_NAME", "EIN", "filings", "ACK_IDs"])
+
+    log = pd.concat(frames, ignore_index=True)
+    grouped = log.groupby(["change", "SPONSOR_DFE_NAME", "EIN"], dropna=False, sort=False)["ACK_ID"]
+    summary = grouped.agg(filings="size", ACK_IDs=lambda ids: " ".join(map(str, ids))).reset_index()
+    order = summary["change"].map({"added": 0, "changed": 1, "removed": 2})
+    return (summary.assign(_order=order)
+            .sort_values(["_order", "filings", "SPONSOR_DFE_NAME"], ascending=[True, False, True])
+            .drop(columns="_order"))
+
+
+def refresh_dataset(zip_url, data_dir="data", force=False):
+    """
+    Bring the local cache of one dataset up to date with the published ZIP
+
+    Args:
+        zip_url (str): URL of the dataset ZIP file
+        data_dir (str): Root directory for downloaded data
+        force (bool): Download and diff even if the remote version looks unchanged
+
+    Returns:
+        DataFrame: Sponsor change log (empty if nothing changed), or None on failure
+    """
+    paths = cache_paths(zip_url, data_dir)
+    zip_path, extract_folder = dataset_paths(zip_url, data_dir)
+    state = load_state(paths)
+    # Caches written before rows were stored typed are rebuilt from scratch
+    cache_exists = (os.path.exists(paths["rows"]) and os.path.exists(paths["hashes"])
+                    and state.get("typed_rows", False))
+
+    print(f"Checking {zip_url}...")
+    version = remote_version(zip_url)
+    if cache_exists and not force and is_unchanged(state, version):
+        print("Published dataset is unchanged since the last ingestion, skipping")
+        metrics.inc("delta_datasets_unchanged_total")
+        return sponsor_change_log(None, None, {change: pd.Index([]) for change in CHANGES})
+
+    # Download and extract to temporary paths. The ZIP and extraction folder are only
+    # replaced after the new cache is written, so a running query server never sees
+    # a ZIP newer than the cache and never reads a half-extracted CSV.
+    partial_path = zip_path + ".part"
+    if not download_file(zip_url, partial_path):
+        print("Failed to download the ZIP file.")
+        return None
+
+    staging_folder = extract_folder + ".part"
+    shutil.rmtree(staging_folder, ignore_errors=True)
+    extracted_files = extract_zip(partial_path, staging_folder)
+    csv_files = [f for f in extracted_files if f.lower().endswith('.csv')]
+    if not csv_files:
+        print("No CSV files found in the extracted ZIP.")
+        return None
+
+    # Parse once as published text so row hashes do not depend on dtype inference;
+    # only the added and changed rows are then converted to typed values
+    text_df = load_csv(csv_files[0], dtype=str, keep_default_na=False)
+    new_hashes = row_hashes(text_df)
+
+    with metrics.span("apply_delta", dataset=os.path.basename(zip_url)) as span:
+        if cache_exists:
+            cached = pd.read_pickle(paths["rows"])
+            old_hashes = pd.read_pickle(paths["hashes"])
+        else:
+            print("No previous ingestion found, treating every filing as added")
+            cached = None
+            old_hashes = new_hashes.iloc[0:0]
+
+        delta = diff_datasets(old_hashes, new_hashes)
+        changes = {change: len(ids) for change, ids in delta.items()}
+        span.update(changes)
+        for change, count in changes.items():
+            metrics.inc("delta_filings_total", count, change=change)
+        print(f"Delta: {changes['added']} added, {changes['changed']} changed, {changes['removed']} removed")
+
+        incoming_text = text_df.loc[text_df["ACK_ID"].isin(delta["added"].append(delta["changed"]))]
+        incoming = typed_rows(incoming_text, cached.dtypes if cached is not None else None)
+        if cached is None:
+            cached = incoming.iloc[0:0]
+        del text_df, incoming_text
+
+        change_log = sponsor_change_log(cached, incoming, delta)
+
+        if any(changes.values()):
+            updated = apply_delta(cached, incoming, delta)
+            write_atomically(paths["hashes"], new_hashes.to_pickle)
+            write_atomically(paths["rows"], updated.to_pickle)
+
+    state = {
+        "zip_url": zip_url,
+        **version,
+        "ingested_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "rows": len(new_hashes),
+        "typed_rows": True,
+        **changes,
+    }
+
+    def write_state(path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+    write_atomically(paths["state"], write_state)
+
+    # The ZIP keeps its download time, so it stays older than the cache just written
+    os.replace(partial_path, zip_path)
+    shutil.rmtree(extract_folder, ignore_errors=True)
+    os.replace(staging_folder, extract_folder)
+
+    return change_log
+
+
+def main(years=None, urls=None, data_dir="data", force=False, changelog_path=None):
+    """
+    Refresh one or more datasets and report which sponsors gained new filings
+
+    Args:
+        years (list, optional): Plan years of the main Form 5500 dataset to refresh
+        urls (list, optional): Additional dataset ZIP URLs to refresh
+        data_dir (str): Root directory for downloaded data
+        force (bool): Download and diff even if the remote version looks unchanged
+        changelog_path (str, optional): Write the combined change log to this .csv or .json file
+    """
+    zip_urls = [dataset_url(year) for year in (years or [])] + list(urls or [])
+    if not zip_urls:
+        zip_urls = [dataset_url(2023)]
+
+    logs = []
+    for zip_url in zip_urls:
+        change_log = refresh_dataset(zip_url, data_dir, force)
+        if change_log is None:
+            print(f"Refresh failed for {zip_url}")
+            continue
+        if len(change_log) > 0:
+            logs.append(change_log.assign(dataset=os.path.basename(zip_url).replace(".zip", "")))
+
+    if not logs:
+        print("\nNo filing changes found.")
+        return
+
+    combined = pd.concat(logs, ignore_index=True)
+    if changelog_path:
+        write_results(combined, changelog_path)
+    else:
+        added = combined[combined["change"] == "added"]
+        print(f"\n{len(added)} sponsors gained new filings:")
+        print(added[["dataset", "SPONSOR_DFE_NAME", "EIN", "filings"]].to_string(index=False))
+
+    print("\nDelta ingestion completed.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incremental refresh of Form 5500 \"Latest\" datasets")
+    parser.add_argument("--year", type=int, nargs="+", help="Plan years to refresh (default: 2023)")
+    parser.add_argument("--url", type=str, nargs="+", help="Additional dataset ZIP URLs to refresh")
+    parser.add_argument("--data-dir", type=str, default="data", help="Data directory (default: data)")
+    parser.add_argument("--force", action="store_true",
+                        help="Download and diff even if the published file looks unchanged")
+    parser.add_argument("--changelog", type=str, help="Write the sponsor change log to this .csv or .json file")
+    add_metrics_arguments(parser)
+
+    args = parser.parse_args()
+
+    metrics.configure(jsonl_path=args.metrics_jsonl, port=args.metrics_port)
+    try:
+        main(years=args.year, urls=args.url, data_dir=args.data_dir, force=args.force,
+             changelog_path=args.changelog)
+    finally:
+        metrics.close()
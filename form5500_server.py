@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Form 5500 Query Server
+
+Keeps one or more Form 5500 plan-year datasets loaded in memory and answers
+sponsor-name, EIN and ACK_ID queries over HTTP/JSON on localhost. Recent query
+results are kept in an LRU cache, and a dataset is reloaded in the background
+when a newer ZIP file or delta ingestion cache appears in the data directory.
+"""
+
+import os
+import json
+import time
+import argparse
+import threading
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import pandas as pd
+
+from form5500_analysis import (
+    dataset_url, dataset_paths, ein_column, rank_sponsor_names, select_filings,
+)
+from form5500_delta import cache_paths, load_rows
+from instrumentation import metrics, add_metrics_arguments
+
+
+def normalize_ein(value):
+    """Return an EIN as an integer, ignoring dashes and spaces, or None if invalid"""
+    digits = "".join(ch for ch in str(value) if ch.isdigit())
+    return int(digits) if digits else None
+
+
+def to_records(df):
+    """Convert a DataFrame to JSON-safe records (NaN becomes null)"""
+    return json.loads(df.to_json(orient="records"))
+
+
+class Dataset:
+    """
+    One plan-year dataset and its lookup structures
+
+    The structures are built once per load: distinct sponsor names for fuzzy
+    ranking, a hash index on ACK_ID and row positions grouped by EIN.
+    """
+
+    def __init__(self, label, zip_url, data_dir="data"):
+        self.label = label
+        self.zip_url = zip_url
+        self.data_dir = data_dir
+        self.zip_path, _ = dataset_paths(zip_url, data_dir)
+        self.cache_path = cache_paths(zip_url, data_dir)["rows"]
+        self.source_mtime_loaded = None
+        self.df = None
+        self.names = None
+        self.ack_index = None
+        self.ein_positions = {}
+        self.loaded_at = None
+
+    def source_mtime(self):
+        """Return the modification time of the newest of the ZIP and the delta cache"""
+        mtimes = [os.path.getmtime(path) for path in (self.zip_path, self.cache_path) if os.path.exists(path)]
+        return max(mtimes) if mtimes else None
+
+    def read_rows(self):
+        """Read the dataset rows, preferring the delta ingestion cache when it is current"""
+        df = load_rows(self.zip_url, self.data_dir)
+        if df is None:
+            raise RuntimeError(f"Could not prepare dataset {self.label} from {self.zip_url}")
+        return df
+
+    def load(self):
+        """
+        Load the dataset and build its indexes
+
+        Returns:
+            Dataset: A new, fully built Dataset (the current one is left untouched
+                     so in-flight queries keep working during a reload)
+        """
+        fresh = Dataset(self.label, self.zip_url, self.data_dir)
+        with metrics.span("load_dataset", dataset=self.label):
+            fresh.source_mtime_loaded = fresh.source_mtime()
+            df = fresh.read_rows()
+
+            fresh.df = df
+            fresh.names = df['SPONSOR_DFE_NAME'].dropna().unique()
+            fresh.ack_index = pd.Index(df['ACK_ID'].astype(str))
+            column = ein_column(df)
+            if column:
+                eins = pd.to_numeric(df[column], errors='coerce').astype('Int64')
+                fresh.ein_positions = eins.groupby(eins, sort=False).indices
+            fresh.loaded_at = time.time()
+        print(f"Loaded dataset {self.label}: {len(df)} rows, {len(fresh.names)} distinct sponsors")
+        return fresh
+
+    def source_is_newer(self):
+        """Return True if the ZIP or delta cache on disk is newer than what was loaded"""
+        mtime = self.source_mtime()
+        return mtime is not None and mtime > (self.source_mtime_loaded or 0)
+
+    def by_sponsor(self, name, top_k, similarity_threshold):
+        ranked = rank_sponsor_names(self.names, name, top_k, similarity_threshold)
+        return select_filings(self.df, ranked)
+
+    def by_ack_id(self, ack_id):
+        positions = self.ack_index.get_indexer_for([ack_id])
+        return self.df.iloc[positions[positions >= 0]]
+
+    def by_ein(self, ein):
+        positions = self.ein_positions.get(ein)
+        if positions is None:
+            return self.df.iloc[0:0]
+        return self.df.iloc[positions]
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache of query results"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                metrics.inc("query_cache_hits_total")
+                return self.entries[key]
+            self.misses += 1
+            metrics.inc("query_cache_misses_total")
+            return None
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            return {"entries": len(self.entries), "max_entries": self.max_entries,
+                    "hits": self.hits, "misses": self.misses}
+
+
+class QueryService:
+    """Answers queries against all loaded datasets and manages hot reload"""
+
+    def __init__(self, datasets, cache_size=1024, reload_interval=60):
+        self.datasets = {dataset.label: dataset for dataset in datasets}
+        self.cache = LRUCache(cache_size)
+        self.reload_interval = reload_interval
+        self.reload_lock = threading.Lock()
+        self.stopped = threading.Event()
+        # Bumped after every reload; part of each cache key so results computed
+        # from a replaced dataset can never be served after the reload
+        self.generation = 0
+
+    def load_all(self):
+        for label, dataset in list(self.datasets.items()):
+            self.datasets[label] = dataset.load()
+
+    def query(self, kind, value, **options):
+        """
+        Run a query against every loaded dataset, using the LRU cache
+
+        Args:
+            kind (str): 'sponsor', 'ein' or 'ack'
+            value (str): Sponsor name, EIN or ACK_ID
+            **options: top_k and threshold for sponsor queries
+
+        Returns:
+            dict: Query echo and the list of matching filing records
+        """
+        key = (self.generation, kind, value, tuple(sorted(options.items())))
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        with metrics.span("query", kind=kind):
+            frames = []
+            for label, dataset in list(self.datasets.items()):
+                if kind == "sponsor":
+                    rows = dataset.by_sponsor(value, options["top_k"], options["threshold"])
+                elif kind == "ein":
+                    rows = dataset.by_ein(normalize_ein(value))
+                else:
+                    rows = dataset.by_ack_id(value)
+                if len(rows) > 0:
+                    frames.append(rows.assign(dataset=label))
+
+            if frames:
+                results = pd.concat(frames, ignore_index=True)
+                if kind == "sponsor":
+                    results = results.sort_values('similarity_score', ascending=False, kind='stable')
+                records = to_records(results)
+            else:
+                records = []
+        metrics.inc("queries_total", kind=kind)
+
+        response = {"query": {"kind": kind, "value": value, **options},
+                    "count": len(records), "results": records}
+        self.cache.put(key, response)
+        return response
+
+    def reload_changed(self):
+        """Reload every dataset whose ZIP or delta cache is newer than the loaded copy"""
+        with self.reload_lock:
+            for label, dataset in list(self.datasets.items()):
+                if not dataset.source_is_newer():
+                    continue
+                print(f"Newer data detected for dataset {label}, reloading...")
+                try:
+                    self.datasets[label] = dataset.load()
+                except Exception as e:
+                    print(f"Error reloading dataset {label}: {e}")
+                    continue
+                self.generation += 1
+                self.cache.clear()
+                metrics.inc("dataset_reloads_total", dataset=label)
+
+    def watch(self):
+        """Poll for newer data until stop() is called"""
+        while not self.stopped.wait(self.reload_interval):
+            self.reload_changed()
+
+    def start_watcher(self):
+        if self.reload_interval > 0:
+            threading.Thread(target=self.watch, daemon=True).start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def stats(self):
+        return {
+            "datasets": {
+                label: {"rows": len(dataset.df), "sponsors": len(dataset.names),
+                        "zip_path": dataset.zip_path, "loaded_at": dataset.loaded_at}
+                for label, dataset in self.datasets.items()
+            },
+            "cache": self.cache.stats(),
+        }
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """
+    HTTP/JSON endpoints:
+
+        GET /sponsor?name=...&top_k=10&threshold=80   (top_k names per dataset)
+        GET /ein?ein=...
+        GET /ack?id=...
+        GET /stats
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        service = self.server.service
+        started = time.time()
+
+        try:
+            route = parsed.path.rstrip("/")
+            if route == "/sponsor" and params.get("name"):
+                top_k = int(params.get("top_k", 10))
+                if top_k < 1:
+                    raise ValueError(f"top_k must be at least 1, got {top_k}")
+                response = service.query(
+                    "sponsor", params["name"].strip().upper(),
+                    top_k=top_k,
+                    threshold=int(params.get("threshold", 80)),
+                )
+            elif route == "/ein" and params.get("ein"):
+                response = service.query("ein", params["ein"].strip())
+            elif route == "/ack" and params.get("id"):
+                response = service.query("ack", params["id"].strip())
+            elif route == "/stats":
+                response = service.stats()
+            else:
+                self.send_json(404, {"error": "Unknown endpoint or missing parameter"})
+                return
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        except Exception as e:
+            self.send_json(500, {"error": str(e)})
+            return
+
+        metrics.observe("http_request_seconds", time.time() - started, route=parsed.path)
+        self.send_json(200, response)
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class QueryServer(ThreadingHTTPServer):
+
+    daemon_threads = True
+
+    def __init__(self, address, service):
+        super().__init__(address, QueryHandler)
+        self.service = service
+
+
+def main(years=None, urls=None, data_dir="data", host="127.0.0.1", port=8500,
+         cache_size=1024, reload_interval=60):
+    """
+    Load the datasets and serve queries until interrupted
+
+    Args:
+        years (list, optional): Plan years to load (main Form 5500 dataset)
+        urls (list, optional): Additional dataset ZIP URLs to load
+        data_dir (str): Root directory for downloaded data
+        host (str): Interface to bind to (localhost by default)
+        port (int): Port to listen on
+        cache_size (int): Maximum number of cached query results
+        reload_interval (float): Seconds between checks for newer data (0 disables)
+    """
+    datasets = [Dataset(str(year), dataset_url(year), data_dir) for year in (years or [])]
+    datasets += [Dataset(os.path.basename(url).replace(".zip", ""), url, data_dir) for url in (urls or [])]
+    if not datasets:
+        datasets = [Dataset("2023", dataset_url(2023), data_dir)]
+
+    service = QueryService(datasets, cache_size, reload_interval)
+    print(f"Loading {len(datasets)} dataset(s)...")
+    service.load_all()
+    service.start_watcher()
+
+    server = QueryServer((host, port), service)
+    print(f"Form 5500 query server listening on http://{host}:{server.server_address[1]}")
+    print("Press Ctrl+C to stop")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down query server...")
+    finally:
+        service.stop()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resident Form 5500 query server")
+    parser.add_argument("--year", type=int, nargs="+", help="Plan years to load (default: 2023)")
+    parser.add_argument("--url", type=str, nargs="+", help="Additional dataset ZIP URLs to load")
+    parser.add_argument("--data-dir", type=str, default="data", help="Data directory (default: data)")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Interface to bind to")
+    parser.add_argument("--port", type=int, default=8500, help="Port to listen on (default: 8500)")
+    parser.add_argument("--cache-size", type=int, default=1024,
+                        help="Maximum number of cached query results (default: 1024)")
+    parser.add_argument("--reload-interval", type=float, default=60,
+                        help="Seconds between checks for newer dataset ZIPs or delta caches, 0 to disable (default: 60)")
+    add_metrics_arguments(parser)
+
+    args = parser.parse_args()
+
+    metrics.configure(jsonl_path=args.metrics_jsonl, port=args.metrics_port)
+    try:
+        main(years=args.year, urls=args.url, data_dir=args.data_dir, host=args.host, port=args.port,
+             cache_size=args.cache_size, reload_interval=args.reload_interval)
+    finally:
+        metrics.close()
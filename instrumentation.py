@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Instrumentation
+
+Lightweight metrics and tracing shared by the Form 5500 tools. Records counters,
+latency histograms and per-stage spans in-process, and can publish them as JSON
+lines to a file and/or as Prometheus text on a local HTTP endpoint. A rate-limited
+progress printer replaces per-chunk console output in hot loops.
+"""
+
+import json
+import time
+import threading
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Histogram bucket upper bounds in seconds (Prometheus-style, cumulative)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, float("inf"))
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key):
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in key) + "}"
+
+
+class Histogram:
+    """Cumulative bucket histogram of observed durations"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+
+    def snapshot(self):
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+        return {"count": self.count, "sum": self.total, "buckets": buckets}
+
+
+class Metrics:
+    """
+    Thread-safe registry of counters, histograms and spans
+
+    Nothing is written anywhere until configure() attaches a JSON lines file or
+    starts the HTTP endpoint, so instrumented code costs a dict update per event.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.sink = None
+        self.server = None
+
+    def configure(self, jsonl_path=None, port=None, host="127.0.0.1"):
+        """
+        Attach outputs to the registry
+
+        Args:
+            jsonl_path (str, optional): Append span and counter events as JSON lines
+            port (int, optional): Serve Prometheus text at http://host:port/metrics
+            host (str): Interface for the metrics endpoint
+        """
+        if jsonl_path:
+            self.sink = open(jsonl_path, "a", encoding="utf-8")
+        if port is not None:
+            self.server = _MetricsServer((host, port), self)
+            threading.Thread(target=self.server.serve_forever, daemon=True).start()
+            print(f"Metrics available at http://{host}:{self.server.server_address[1]}/metrics")
+
+    def close(self):
+        """Write a final snapshot to the JSON lines sink and stop the endpoint"""
+        if self.sink:
+            self.emit({"type": "snapshot", **self.snapshot()})
+            self.sink.close()
+            self.sink = None
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def inc(self, name, value=1, **labels):
+        """Increment a counter"""
+        key = (name, _label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        """Record a duration in a histogram"""
+        key = (name, _label_key(labels))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """
+        Time a stage of work
+
+        Records the duration in the '<name>_seconds' histogram and emits a span
+        event. Attributes can be added to the yielded dict while the span is open.
+        """
+        record = dict(attributes)
+        started = time.time()
+        status = "ok"
+        try:
+            yield record
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            duration = time.time() - started
+            self.observe(f"{name}_seconds", duration, status=status)
+            if self.sink:
+                self.emit({"type": "span", "name": name, "start": started,
+                           "duration": duration, "status": status, **record})
+
+    def emit(self, event):
+        """Write one event to the JSON lines sink, if configured"""
+        if not self.sink:
+            return
+        line = json.dumps(event, default=str)
+        with self.lock:
+            self.sink.write(line + "\n")
+            self.sink.flush()
+
+    def snapshot(self):
+        """Return the current counters and histograms as plain data"""
+        with self.lock:
+            counters = {name + _format_labels(key): value for (name, key), value in self.counters.items()}
+            histograms = {name + _format_labels(key): h.snapshot() for (name, key), h in self.histograms.items()}
+        return {"counters": counters, "histograms": histograms}
+
+    def prometheus_text(self):
+        """Render the registry in the Prometheus text exposition format"""
+        lines = []
+        with self.lock:
+            for (name, key), value in sorted(self.counters.items()):
+                lines.append(f"{name}{_format_labels(key)} {value}")
+            for (name, key), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+                data = histogram.snapshot()
+                for bound, count in data["buckets"].items():
+                    lines.append(f"{name}_bucket{_format_labels(key + (('le', bound),))} {count}")
+                lines.append(f"{name}_sum{_format_labels(key)} {data['sum']}")
+                lines.append(f"{name}_count{_format_labels(key)} {data['count']}")
+        return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = self.server.metrics.prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _MetricsServer(ThreadingHTTPServer):
+
+    daemon_threads = True
+
+    def __init__(self, address, metrics):
+        super().__init__(address, _MetricsHandler)
+        self.metrics = metrics
+
+
+class Progress:
+    """
+    Rate-limited console progress line
+
+    update() is cheap to call on every iteration; the line is only redrawn when
+    at least `interval` seconds have passed since the last redraw.
+    """
+
+    def __init__(self, label, total=0, unit="bytes", interval=1.0):
+        self.label = label
+        self.total = total
+        self.unit = unit
+        self.interval = interval
+        self.last_print = 0.0
+
+    def update(self, done):
+        now = time.monotonic()
+        if now - self.last_print < self.interval:
+            return
+        self.last_print = now
+        self._print(done)
+
+    def finish(self, done):
+        self._print(done)
+        print()
+
+    def _print(self, done):
+        if self.total > 0:
+            percent = (done / self.total) * 100
+            print(f"{self.label}: {percent:.1f}% ({done}/{self.total} {self.unit})", end='\r')
+        else:
+            print(f"{self.label}: {done} {self.unit}", end='\r')
+
+
+# Default registry used by the scripts in this repository
+metrics = Metrics()
+
+
+def add_metrics_arguments(parser):
+    """Register the --metrics-jsonl and --metrics-port options on an argument parser"""
+    parser.add_argument("--metrics-jsonl", type=str,
+                        help="Append spans and counters as JSON lines to this file")
+    parser.add_argument("--metrics-port", type=int,
+                        help="Serve Prometheus-style metrics on this localhost port")
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Sponsor Entity Resolution
+
+Clusters every SPONSOR_DFE_NAME/EIN pair across one or more plan years into
+sponsor entities, so that e.g. "INTERSECT GROUP INC" and "THE INTERSECT GROUP, LLC"
+resolve to the same employer. Records sharing an EIN or a canonical name are
+merged directly; remaining names are only compared within blocks (shared name
+prefix or token), scored in parallel, and merged with union-find. The result is
+persisted as an entity table that joins back to the filings on name and EIN.
+"""
+
+import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+
+from form5500_analysis import (
+    dataset_url, ein_column, rank_sponsor_names, write_results,
+    print_results, positive_int,
+)
+from form5500_delta import load_rows
+from instrumentation import metrics, add_metrics_arguments
+
+# Legal-form words stripped from the end of canonical names
+LEGAL_SUFFIXES = [
+    "INCORPORATED", "INC", "CORPORATION", "CORP", "COMPANY", "CO", "LIMITED", "LTD",
+    "LLC", "LLP", "LP", "PLLC", "PLC", "PC", "PA", "NA",
+]
+SUFFIX_PATTERN = r"(?:\s+(?:" + "|".join(LEGAL_SUFFIXES) + r"))+$"
+
+# EINs that do not identify a single employer
+INVALID_EINS = {0, 999999999, 111111111, 123456789}
+
+
+class UnionFind:
+    """
+    Disjoint-set forest with path halving and union by size
+
+    When EINs are given, each set keeps the EIN of its members and two sets with
+    different EINs are never merged, so name matches cannot join separate employers.
+    """
+
+    def __init__(self, size, eins=None):
+        self.parent = list(range(size))
+        self.size = [1] * size
+        self.ein = list(eins) if eins is not None else [None] * size
+        self.conflicts = 0
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return False
+        ein_a, ein_b = self.ein[root_a], self.ein[root_b]
+        if ein_a is not None and ein_b is not None and ein_a != ein_b:
+            self.conflicts += 1
+            return False
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        if self.ein[root_a] is None:
+            self.ein[root_a] = ein_a if ein_a is not None else ein_b
+        return True
+
+    def union_groups(self, labels):
+        """Union every set of positions that share a (non-null) label"""
+        codes, _ = pd.factorize(labels, use_na_sentinel=True)
+        order = np.argsort(codes, kind="stable")
+        sorted_codes = codes[order]
+        # Positions where a new label starts; each run is unioned to its first member
+        for start, end in zip(*run_bounds(sorted_codes)):
+            if sorted_codes[start] < 0 or end - start < 2:
+                continue
+            first = order[start]
+            for position in order[start + 1:end]:
+                self.union(first, position)
+
+    def components(self):
+        return np.array([self.find(item) for item in range(len(self.parent))])
+
+
+def run_bounds(sorted_values):
+    """Return (starts, ends) of runs of equal values in a sorted array"""
+    if len(sorted_values) == 0:
+        return np.array([], dtype=int), np.array([], dtype=int)
+    change = np.flatnonzero(sorted_values[1:] != sorted_values[:-1]) + 1
+    starts = np.concatenate(([0], change))
+    ends = np.concatenate((change, [len(sorted_values)]))
+    return starts, ends
+
+
+def canonical_names(names):
+    """
+    Normalize sponsor names for comparison
+
+    Uppercases, replaces '&' with AND, removes punctuation, a leading THE and
+    trailing legal-form suffixes (INC, LLC, CORP, ...).
+
+    Args:
+        names (Series): Sponsor names
+
+    Returns:
+        Series: Canonical names
+    """
+    canonical = (names.fillna("").astype(str).str.upper()
+                 .str.replace("&", " AND ", regex=False)
+                 .str.replace(r"[^A-Z0-9 ]", " ", regex=True)
+                 .str.replace(r"\s+", " ", regex=True)
+                 .str.strip()
+                 .str.replace(r"^THE\s+", "", regex=True)
+                 .str.replace(SUFFIX_PATTERN, "", regex=True))
+    return canonical
+
+
+def normalize_eins(values):
+    """Return EINs as nullable integers, with placeholder EINs set to null"""
+    eins = pd.to_numeric(values, errors="coerce").astype("Int64")
+    return eins.mask(eins.isin(INVALID_EINS))
+
+
+def load_sponsors(zip_url, data_dir="data"):
+    """
+    Load the ACK_ID, sponsor name and EIN columns of one dataset
+
+    Returns:
+        DataFrame: ACK_ID, SPONSOR_DFE_NAME and EIN columns, or None on failure
+    """
+    wanted = {"ACK_ID", "SPONSOR_DFE_NAME", "SPONS_DFE_EIN", "EIN"}
+    df = load_rows(zip_url, data_dir, usecols=lambda column: column in wanted)
+    if df is None:
+        return None
+
+    column = ein_column(df)
+    return pd.DataFrame({
+        "ACK_ID": df["ACK_ID"],
+        "SPONSOR_DFE_NAME": df["SPONSOR_DFE_NAME"],
+        "EIN": normalize_eins(df[column]) if column else pd.array([pd.NA] * len(df), dtype="Int64"),
+    })
+
+
+def build_blocks(canonical, prefix_length=6, min_token_length=4, max_block_size=500):
+    """
+    Group canonical names into candidate blocks
+
+    A name is placed in the block of its prefix and in one block per token of at
+    least `min_token_length` characters. Blocks with a single name or more than
+    `max_block_size` names (very common tokens such as GROUP) are dropped.
+
+    Args:
+        canonical (list): Distinct canonical names
+
+    Returns:
+        list: Blocks, each a list of positions into `canonical`
+    """
+    keys = []
+    positions = []
+    for position, name in enumerate(canonical):
+        if not name:
+            continue
+        name_keys = {"P:" + name[:prefix_length]}
+        name_keys.update("T:" + token for token in name.split() if len(token) >= min_token_length)
+        keys.extend(name_keys)
+        positions.extend([position] * len(name_keys))
+
+    key_series = pd.Series(positions, index=keys)
+    blocks = []
+    for _, members in key_series.groupby(level=0, sort=False):
+        if 2 <= len(members) <= max_block_size:
+            blocks.append(members.to_list())
+    return blocks
+
+
+def score_blocks(blocks, canonical, similarity_threshold):
+    """
+    Score all name pairs inside each block
+
+    Args:
+        blocks (list): Blocks of positions into `canonical`
+        canonical (list): Distinct canonical names
+        similarity_threshold (int): Minimum token_sort_ratio to merge two names
+
+    Returns:
+        list: (position, position) pairs scoring at or above the threshold
+    """
+    pairs = []
+    for block in blocks:
+        names = [canonical[position] for position in block]
+        scores = process.cdist(names, names, scorer=fuzz.token_sort_ratio,
+                               score_cutoff=similarity_threshold, dtype=np.uint8)
+        rows, cols = np.nonzero(np.triu(scores, k=1))
+        pairs.extend((block[row], block[col]) for row, col in zip(rows, cols))
+    return pairs
+
+
+def _score_chunk(args):
+    blocks, canonical, similarity_threshold = args
+    return score_blocks(blocks, canonical, similarity_threshold)
+
+
+def resolve_entities(sponsors, similarity_threshold=90, workers=None, max_block_size=500):
+    """
+    Cluster sponsor records into entities
+
+    Args:
+        sponsors (DataFrame): ACK_ID, SPONSOR_DFE_NAME and EIN rows (any number of years)
+        similarity_threshold (int): Minimum token_sort_ratio between canonical names to merge
+        workers (int, optional): Processes used for pair scoring (default: CPU count)
+        max_block_size (int): Largest candidate block that is scored
+
+    Returns:
+        DataFrame: One row per distinct SPONSOR_DFE_NAME/EIN with its canonical
+                   name, ENTITY_ID, ENTITY_NAME and filing count
+    """
+    with metrics.span("resolve_entities", rows=len(sponsors)) as span:
+        records = (sponsors.groupby(["SPONSOR_DFE_NAME", "EIN"], dropna=False, sort=False)
+                   .size().rename("FILINGS").reset_index())
+        records = records[records["SPONSOR_DFE_NAME"].notna()].reset_index(drop=True)
+        records["CANONICAL_NAME"] = canonical_names(records["SPONSOR_DFE_NAME"])
+        print(f"Resolving {len(records)} distinct sponsor name/EIN records...")
+
+        eins = records["EIN"].to_numpy(dtype=object, na_value=None)
+        forest = UnionFind(len(records), eins)
+        forest.union_groups(eins)
+        forest.union_groups(records["CANONICAL_NAME"].replace("", None).to_numpy(dtype=object))
+
+        # Fuzzy matching works on distinct canonical names only
+        name_codes, canonical = pd.factorize(records["CANONICAL_NAME"])
+        canonical = list(canonical)
+        first_record = pd.Series(np.arange(len(records))).groupby(name_codes).first().to_numpy()
+
+        blocks = build_blocks(canonical, max_block_size=max_block_size)
+        span["names"] = len(canonical)
+        span["blocks"] = len(blocks)
+        print(f"Scoring {len(blocks)} blocks over {len(canonical)} canonical names...")
+
+        workers = workers or os.cpu_count() or 1
+        if workers > 1 and len(blocks) > workers:
+            chunks = [(blocks[i::workers], canonical, similarity_threshold) for i in range(workers)]
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                pairs = [pair for chunk in executor.map(_score_chunk, chunks) for pair in chunk]
+        else:
+            pairs = score_blocks(blocks, canonical, similarity_threshold)
+
+        # Names sharing several blocks are scored once per block
+        pairs = set(pairs)
+        merged = sum(forest.union(first_record[a], first_record[b]) for a, b in pairs)
+        span["pairs"] = len(pairs)
+        span["ein_conflicts"] = forest.conflicts
+        metrics.inc("entity_pairs_scored_total", len(pairs))
+        print(f"{len(pairs)} similar name pairs found, {merged} merges applied, "
+              f"{forest.conflicts} merges refused for conflicting EINs")
+
+        roots = forest.components()
+        records["ENTITY_ID"] = pd.factorize(roots)[0]
+
+        # Name each entity after its most frequently filed sponsor name
+        names = (records.sort_values("FILINGS", ascending=False, kind="stable")
+                 .drop_duplicates("ENTITY_ID").set_index("ENTITY_ID")["SPONSOR_DFE_NAME"])
+        records["ENTITY_NAME"] = records["ENTITY_ID"].map(names)
+        span["entities"] = records["ENTITY_ID"].nunique()
+
+    print(f"Resolved {len(records)} records into {records['ENTITY_ID'].nunique()} entities")
+    return records[["ENTITY_ID", "ENTITY_NAME", "SPONSOR_DFE_NAME", "EIN", "CANONICAL_NAME", "FILINGS"]]
+
+
+def load_entities(entities_path):
+    """Load a persisted entity table"""
+    if entities_path.lower().endswith(".json"):
+        entities = pd.read_json(entities_path, orient="records")
+    else:
+        entities = pd.read_csv(entities_path)
+    entities["EIN"] = entities["EIN"].astype("Int64")
+    return entities
+
+
+def lookup_entity(entities, name, top_k=1, similarity_threshold=80):
+    """
+    Resolve a sponsor name to the members of its closest entities
+
+    Args:
+        entities (DataFrame): Entity table from resolve_entities/load_entities
+        name (str): Sponsor name to look up
+        top_k (int): Number of entities to return
+
+    Returns:
+        DataFrame: Entity table rows of the matching entities
+    """
+    target = canonical_names(pd.Series([name])).iloc[0]
+    ranked = rank_sponsor_names(entities["CANONICAL_NAME"].dropna().unique(), target,
+                                top_k * 5, similarity_threshold)
+    scores = dict(ranked)
+    hits = entities.loc[entities["CANONICAL_NAME"].isin(scores.keys())]
+    best = (hits.assign(similarity_score=hits["CANONICAL_NAME"].map(scores))
+            .groupby("ENTITY_ID")["similarity_score"].max()
+            .sort_values(ascending=False).head(top_k))
+    return entities.loc[entities["ENTITY_ID"].isin(best.index)].sort_values(["ENTITY_ID", "FILINGS"],
+                                                                             ascending=[True, False])
+
+
+def entity_filings(filings, entities, entity_ids):
+    """
+    Return every filing of the given entities with a single join
+
+    Args:
+        filings (DataFrame): Dataset rows (SPONSOR_DFE_NAME and an EIN column)
+        entities (DataFrame): Entity table
+        entity_ids (iterable): Entity IDs to select
+
+    Returns:
+        DataFrame: Filings with ENTITY_ID and ENTITY_NAME columns
+    """
+    members = entities.loc[entities["ENTITY_ID"].isin(list(entity_ids)),
+                           ["SPONSOR_DFE_NAME", "EIN", "ENTITY_ID", "ENTITY_NAME"]]
+    column = ein_column(filings)
+    keys = filings.assign(EIN=normalize_eins(filings[column]) if column else pd.NA)
+    return keys.merge(members, on=["SPONSOR_DFE_NAME", "EIN"], how="inner")
+
+
+def main(years=None, urls=None, data_dir="data", entities_path=None, similarity_threshold=90,
+         workers=None, lookup=None, top_k=1, output_path=None):
+    """
+    Build the sponsor entity table, or look up an entity and all of its filings
+
+    Args:
+        years (list, optional): Plan years of the main Form 5500 dataset to cluster or search
+        urls (list, optional): Additional dataset ZIP URLs to cluster or search
+        data_dir (str): Root directory for downloaded data
+        entities_path (str, optional): Entity table path (.csv or .json).
+                                       Defaults to <data_dir>/entities.csv
+        similarity_threshold (int): Minimum token_sort_ratio between canonical names to merge
+        workers (int, optional): Processes used for pair scoring
+        lookup (str, optional): Instead of building, resolve this sponsor name with
+                                the existing entity table and select its filings
+        top_k (int): Number of entities to resolve for a lookup
+        output_path (str, optional): Write the filings of a lookup to this .csv or .json file
+    """
+    if entities_path is None:
+        entities_path = os.path.join(data_dir, "entities.csv")
+
+    zip_urls = [dataset_url(year) for year in (years or [])] + list(urls or [])
+    if not zip_urls:
+        zip_urls = [dataset_url(2023)]
+
+    if lookup:
+        entities = load_entities(entities_path)
+        members = lookup_entity(entities, lookup, top_k)
+        if len(members) == 0:
+            print("\nNo matching entities found.")
+            return
+        print(members.to_string(index=False))
+
+        frames = []
+        for zip_url in zip_urls:
+            filings = load_rows(zip_url, data_dir)
+            if filings is None:
+                print(f"Could not load {zip_url}. Exiting.")
+                return
+            frames.append(entity_filings(filings, entities, members["ENTITY_ID"].unique()))
+        matches = pd.concat(frames, ignore_index=True)
+
+        print(f"\n{len(matches)} filings across {members['ENTITY_ID'].nunique()} entities")
+        if output_path:
+            write_results(matches, output_path)
+        elif len(matches) > 0:
+            print_results(matches)
+        return
+
+    frames = []
+    for zip_url in zip_urls:
+        sponsors = load_sponsors(zip_url, data_dir)
+        if sponsors is None:
+            print(f"Could not load {zip_url}. Exiting.")
+            return
+        frames.append(sponsors)
+
+    entities = resolve_entities(pd.concat(frames, ignore_index=True), similarity_threshold, workers)
+    write_results(entities, entities_path)
+
+    print("\nEntity resolution completed.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cluster Form 5500 sponsors into entities")
+    parser.add_argument("--year", type=int, nargs="+", help="Plan years to cluster or search (default: 2023)")
+    parser.add_argument("--url", type=str, nargs="+", help="Additional dataset ZIP URLs to cluster or search")
+    parser.add_argument("--data-dir", type=str, default="data", help="Data directory (default: data)")
+    parser.add_argument("--entities", type=str,
+                        help="Entity table path, .csv or .json (default: data/entities.csv)")
+    parser.add_argument("--threshold", type=int, default=90,
+                        help="Minimum similarity (0-100) between canonical names to merge (default: 90)")
+    parser.add_argument("--workers", type=int, help="Processes used for pair scoring (default: CPU count)")
+    parser.add_argument("--lookup", type=str,
+                        help="Resolve a sponsor name with an existing entity table and list the entity's filings")
+    parser.add_argument("--top-k", type=positive_int, default=1, help="Entities to resolve for --lookup (default: 1)")
+    parser.add_argument("--output", type=str, help="Write the filings found by --lookup to this .csv or .json file")
+    add_metrics_arguments(parser)
+
+    args = parser.parse_args()
+
+    metrics.configure(jsonl_path=args.metrics_jsonl, port=args.metrics_port)
+    try:
+        main(years=args.year, urls=args.url, data_dir=args.data_dir, entities_path=args.entities,
+             similarity_threshold=args.threshold, workers=args.workers, lookup=args.lookup, top_k=args.top_k,
+             output_path=args.output)
+    finally:
+        metrics.close()